@@ -5,9 +5,11 @@ from sqlalchemy import (
     create_engine,
     Column,
     Integer,
+    BigInteger,
     String,
     LargeBinary,
     DateTime,
+    Text,
     UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
@@ -30,12 +32,36 @@ class UploadedFile(Base):
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String, index=True)
     content = Column(LargeBinary)
+    # "parquet" for files ingested as columnar data, "csv" for legacy uploads
+    storage_format = Column(String, nullable=False, default="csv", server_default="csv")
+    # JSON list of {"name", "dtype"} inferred at upload time
+    schema = Column(Text)
+    content_hash = Column(String)
+    # JSON profile (null, zero and distinct counts, duplicated rows) computed at upload time
+    profile = Column(Text)
     upload_datetime = Column(DateTime(timezone=True), server_default=func.now())
     category = Column(String, index=True)
 
     __table_args__ = (UniqueConstraint('filename', 'category', name='_filename_category_uc'),)
 
 
+class SimulationResult(Base):
+    __tablename__ = "simulation_results"
+    id = Column(Integer, primary_key=True, index=True)
+    # Endpoint or artifact that produced the result, e.g. "l1-sample-size"
+    kind = Column(String, nullable=False)
+    # Canonical hash of the request parameters
+    params_hash = Column(String, nullable=False)
+    # zlib-compressed JSON response or rendered figure
+    result = Column(LargeBinary, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_accessed_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (UniqueConstraint('kind', 'params_hash', name='_kind_params_hash_uc'),)
+
+
 # Create all tables if they don't exist
 Base.metadata.create_all(bind=engine)
 
@@ -1,8 +1,13 @@
+import hashlib
 import json
+import os
 import pandas as pd
 import numpy as np
 import io
-from typing import List
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
 from fastapi import (
     FastAPI,
     HTTPException,
@@ -11,9 +16,11 @@ from fastapi import (
     Form,
     Query,
     Depends,
+    Request,
 )
-from fastapi.responses import Response, JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session, defer
 from api.models import (
     DropExportDuplicatesInput,
     DropExportDuplicatesResponse,
@@ -22,26 +29,67 @@ from api.models import (
     UniqueIDResponse,
     UniqueIDCheckInput,
     UniqueIDCheckResponse,
+    UniqueIDScreenedResponse,
     L1SampleSizeInput,
+    L1SampleSizeSweepInput,
     L2SampleSizeInput,
     ThirdPartySamplingInput,
+    JobSubmitResponse,
+    JobStatusResponse,
 )
 from api.utils.administrative_data_quality_checklist import (
+    DEDUP_DUPLICATE_FILE,
+    DEDUP_UNIQUE_FILE,
+    UNIQUE_ID_SAMPLE_ROWS,
     analyze_frequency_table,
     analyze_indicator_fill_rate,
     analyze_missing_entries,
     analyze_zero_entries,
     findUniqueIDs,
     uniqueIDcheck,
-    dropExportDuplicates,
+    dropExportDuplicatesFromFile,
+    iter_dedup_output,
+    preliminary_tests_from_profile,
+    read_dedup_output,
     run_preliminary_tests,
+    unique_id_candidates,
+    writeExportDuplicates,
 )
 from api.utils.pre_survey_analysis import (
+    FIGURE_FORMATS,
+    THIRD_PARTY_FIGURES,
     error_handling,
     l1_sample_size_calculator,
+    l1_sample_size_sweep,
     l2_sample_size_calculator,
+    new_seed,
+    render_third_party_figure,
+    shutdown_simulation_pool,
+    simulate_third_party_sampling,
     third_party_sampling_strategy,
 )
+from api.utils.array_encoding import (
+    FORMAT_JSON,
+    MEDIA_TYPES,
+    encode_arrays,
+    negotiate_format,
+)
+from api.utils.artifact_store import ArtifactStore
+from api.utils.dataframe_cache import DataFrameCache
+from api.utils.jobs import JOB_FAILED, JOB_FINISHED, JOB_QUEUED, JobManager
+from api.utils.result_cache import SimulationResultCache, params_hash
+from api.utils.file_storage import (
+    INGEST_CHUNK_ROWS,
+    STORAGE_FORMAT_CSV,
+    STORAGE_FORMAT_PARQUET,
+    content_hash,
+    csv_to_parquet,
+    read_stored_file,
+    stored_columns,
+    schema_json,
+    stored_file_to_csv,
+)
+from api.utils.profiling import PROFILE_VERSION, DataProfiler, profile_dataframe
 from api.utils.post_survey_analysis import calculate_discrepancy_scores
 from api.utils.pseudo_code import anganwadi_center_data_anaylsis
 from api.database import get_db, UploadedFile
@@ -54,12 +102,51 @@ from io import StringIO
 app = FastAPI()
 logger = logging.getLogger(__name__)
 
-# Global variable to store the last processed data
-last_processed_data = {"unique_rows": None, "duplicate_rows": None}
+# Deduplication results, stored on disk by file content and parameters so every
+# API process shares them
+dedup_artifacts = ArtifactStore(
+    root=os.getenv(
+        "DEDUP_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "validata-dedup")
+    ),
+    ttl_seconds=float(os.getenv("DEDUP_ARTIFACT_TTL_SECONDS", str(24 * 3600))),
+    max_bytes=int(os.getenv("DEDUP_ARTIFACT_MAX_BYTES", str(10 * 1024**3))),
+)
 
 # Global variable to store the last deduplicated data
 last_deduplicated_data = None
 
+SUPPORTED_UPLOAD_ENCODINGS = ['utf-8', 'utf-8-sig', 'iso-8859-1', 'windows-1252', 'ascii']
+
+# Encoding and delimiter are detected from this many bytes at the start of an upload
+UPLOAD_SNIFF_BYTES = 64 * 1024
+
+# Converted uploads are kept in memory up to this size, then spooled to disk
+UPLOAD_SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Long-running simulations run in worker processes instead of the event loop
+job_manager = JobManager(
+    max_workers=int(os.getenv("JOB_WORKERS", "0")) or None,
+    result_ttl=float(os.getenv("JOB_RESULT_TTL_SECONDS", "3600")),
+)
+
+FIGURE_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+DEDUP_STREAM_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Upper bound for long-polling job endpoints
+MAX_JOB_WAIT_SECONDS = 60
+
+# Parsed DataFrames shared by all checklist endpoints, bounded by memory size
+dataframe_cache = DataFrameCache(
+    int(os.getenv("DATAFRAME_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+)
+
+# Responses of seeded simulations, persisted in the database
+result_cache = SimulationResultCache(
+    ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000")),
+)
+
 
 @app.on_event("startup")
 async def startup_event():
@@ -69,6 +156,12 @@ async def startup_event():
         print(f"Error creating tables: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_manager.shutdown()
+    shutdown_simulation_pool()
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
@@ -82,54 +175,199 @@ def detect_delimiter(sample_text: str) -> str:
     except csv.Error:
         # Fallback
         return ',' if sample_text.count(',') >= sample_text.count(';') else ';'
+
+
+async def load_dataframe(
+    file: UploadFile,
+    file_id: int,
+    db: Session,
+    columns: Optional[List[str]] = None,
+    **read_options,
+) -> pd.DataFrame:
+    """
+    Load the uploaded or stored file as a DataFrame, parsing it at most once.
+
+    Args:
+    file (UploadFile): File uploaded with the request, takes precedence over file_id.
+    file_id (int): Id of a previously stored file.
+    db (Session): Database session.
+    columns (Optional[List[str]]): Columns needed by the caller. Files stored as
+        Parquet only load these (names missing from the file are ignored so the
+        caller can report them); other sources load every column.
+    **read_options: Keyword arguments passed to pd.read_csv for CSV sources. Files
+        stored as Parquet were parsed at upload with pandas' defaults, so only
+        index_col=False is accepted for them.
+
+    Returns:
+    pd.DataFrame: The parsed dataset, sharing its data with the DataFrame cache;
+        copy it before writing values in place, see DataFrameCache.
+    """
+    if file:
+        contents = await file.read()
+        key = dataframe_cache.make_key(None, content_hash(contents), read_options)
+        return dataframe_cache.get_or_load(
+            key,
+            lambda: pd.read_csv(io.StringIO(contents.decode("utf-8")), **read_options),
+        )
+
+    if not file_id:
+        raise HTTPException(
+            status_code=400, detail="Either file or file_id must be provided"
+        )
+
+    # The content column is only fetched on a cache miss
+    stored_file = (
+        db.query(UploadedFile)
+        .options(defer(UploadedFile.content))
+        .filter(UploadedFile.id == file_id)
+        .first()
+    )
+    if not stored_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    storage_format = stored_file.storage_format or STORAGE_FORMAT_CSV
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        # Raise rather than silently parse stored and uploaded files differently
+        unsupported = sorted(set(read_options) - {"index_col"})
+        if unsupported or read_options.get("index_col", False) is not False:
+            raise ValueError(
+                f"Read options {unsupported or ['index_col']} cannot be applied to a stored Parquet file"
+            )
+        if columns is not None:
+            if stored_file.schema:
+                available = [col["name"] for col in json.loads(stored_file.schema)]
+            else:
+                available = stored_columns(stored_file.content, storage_format)
+            columns = [col for col in available if col in set(columns)]
+        read_options = {"columns": columns}
+
+    file_hash = stored_file.content_hash or content_hash(stored_file.content)
+    key = dataframe_cache.make_key(file_id, file_hash, read_options)
+    return dataframe_cache.get_or_load(
+        key,
+        lambda: read_stored_file(stored_file.content, storage_format, **read_options),
+    )
+
+
+async def load_profile(file_id: int, db: Session) -> dict:
+    """
+    Return the profile of a stored file, computing and saving it if it is missing
+    or was computed by an older version of the profiler.
+
+    Args:
+    file_id (int): Id of a previously stored file.
+    db (Session): Database session.
+
+    Returns:
+    dict: The profile, see DataProfiler.
+    """
+    stored_file = (
+        db.query(UploadedFile)
+        .options(defer(UploadedFile.content))
+        .filter(UploadedFile.id == file_id)
+        .first()
+    )
+    if not stored_file:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    if stored_file.profile:
+        profile = json.loads(stored_file.profile)
+        if profile.get("version") == PROFILE_VERSION:
+            return profile
+
+    # Files stored before profiles were computed at upload
+    df = await load_dataframe(None, file_id, db)
+    profile = await run_in_threadpool(profile_dataframe, df)
+    stored_file.profile = json.dumps(profile)
+    db.commit()
+    return profile
+
+
+def sniff_upload(prefix: bytes) -> Tuple[Optional[str], str]:
+    """
+    Detect the encoding and delimiter of an upload from the start of the file.
+
+    Args:
+    prefix (bytes): The first bytes of the upload.
+
+    Returns:
+    Tuple[Optional[str], str]: The detected encoding (None if unknown) and delimiter.
+    """
+    detector = chardet.UniversalDetector()
+    detector.feed(prefix)
+    detector.close()
+    encoding = detector.result["encoding"]
+    encoding = encoding.lower() if encoding else None
+    if encoding not in SUPPORTED_UPLOAD_ENCODINGS:
+        return encoding, ","
+
+    # A prefix that is pure ASCII says nothing about the rest of the file
+    if encoding == "ascii":
+        encoding = "utf-8"
+
+    text_sample = prefix.decode(encoding, errors="ignore")
+    header = next(csv.reader(StringIO(text_sample)), [])
+    if len(header) > 1:
+        return encoding, ","
+
+    # If only one column exists, try splitting it
+    logger.warning("Only one column detected. Attempting to split.")
+    detected_delim = detect_delimiter(text_sample[:1000])  # Use first 1000 characters for detection
+    logger.warning(f"Detected delimiter: '{detected_delim}'")
+    return encoding, detected_delim
+
+
+def convert_upload(upload: IO[bytes], encoding: str, delimiter: str) -> Tuple[bytes, str, str]:
+    """
+    Convert an uploaded CSV into Parquet bytes, its JSON schema and its JSON profile.
+
+    The upload is streamed in row batches and the Parquet output is spooled to
+    disk once it grows large, so memory use does not grow with the file size.
+    The profile is computed from the same batches as they are written.
+    """
+
+    @contextmanager
+    def open_text():
+        upload.seek(0)
+        text = io.TextIOWrapper(upload, encoding=encoding, newline="")
+        try:
+            yield text
+        finally:
+            # Leave the underlying upload open for the next pass
+            text.detach()
+
+    profiler = DataProfiler()
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES) as output:
+        dtypes, n_rows = csv_to_parquet(
+            open_text, output, delimiter=delimiter, on_chunk=profiler.add
+        )
+        output.seek(0)
+        stored_content = output.read()
+
+    logger.info(f"Converted upload with {n_rows} rows and {len(dtypes)} columns")
+    return stored_content, schema_json(dtypes), json.dumps(profiler.result())
+
+
 @app.post("/upload_file")
 async def upload_file(
     file: UploadFile = File(...),
     category: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    contents = await file.read()
-    detection = chardet.detect(contents)
-    encoding = detection["encoding"]
-    encoding = encoding.lower() if encoding else None
+    prefix = await file.read(UPLOAD_SNIFF_BYTES)
+    encoding, delimiter = sniff_upload(prefix)
     logger.info(f"Detected file encoding: '{encoding}'")
-    try:
-        if encoding not in ['utf-8', 'utf-8-sig', 'iso-8859-1', 'windows-1252', 'ascii']:
-            logger.warning(f"Unsupported file encoding: {file.filename} (Detected: {encoding})")
-            return JSONResponse(
-                status_code=400, 
-                content={"message": f"Unsupported file encoding: {encoding}"},
-            )
-        
-        # Decode contents
-        text_data = contents.decode(encoding)
-        df_raw = pd.read_csv(io.StringIO(text_data), header=0)
-
-        # If only one column exists, try splitting it
-        if df_raw.shape[1] == 1:
-            logger.warning(f"Only one column detected in {file.filename}. Attempting to split.")
-
-            sample = text_data[:1000]  # Use first 1000 characters for detection
-            detected_delim = detect_delimiter(sample)
-            logger.warning(f"Detected delimiter: '{detected_delim}'")
-            # Split the single column into columns
-            # split_df = df_raw[0].str.split(detected_delim, expand=True)
-            # Use first row as header -> include explicitly headers
-            # split_df.columns = split_df.iloc[0].astype(str)
-            # Drop the header row from data
-            # df = split_df.iloc[1:].reset_index(drop=True)
-            df = pd.read_csv(io.StringIO(text_data), delimiter=detected_delim, header=0)
-
-        else:
-            df = df_raw
-
-        # Convert DataFrame back to CSV
-        processed_csv = df.to_csv(index=False)
-        
+    if encoding not in SUPPORTED_UPLOAD_ENCODINGS:
+        logger.warning(f"Unsupported file encoding: {file.filename} (Detected: {encoding})")
+        return JSONResponse(
+            status_code=400,
+            content={"message": f"Unsupported file encoding: {encoding}"},
+        )
 
+    try:
         # Check if a file with the same name and category already exists
         existing_file = (
-            db.query(UploadedFile)
+            db.query(UploadedFile.id)
             .filter(UploadedFile.filename == file.filename, UploadedFile.category == category)
             .first()
         )
@@ -143,7 +381,30 @@ async def upload_file(
                 },
             )
 
-        db_file = UploadedFile(filename=file.filename, content=processed_csv.encode(encoding), category=category)
+        # Store the parsed data in a compressed columnar format, with its schema
+        try:
+            stored_content, schema, profile = await run_in_threadpool(
+                convert_upload, file.file, encoding, delimiter
+            )
+        except UnicodeDecodeError:
+            # Encoding is detected from the start of the file only; a UTF-8 guess
+            # can be wrong for legacy files whose first non-ASCII byte comes later
+            if encoding not in ("utf-8", "utf-8-sig"):
+                raise
+            logger.warning(f"File {file.filename} is not valid '{encoding}', retrying as 'windows-1252'")
+            stored_content, schema, profile = await run_in_threadpool(
+                convert_upload, file.file, "windows-1252", delimiter
+            )
+
+        db_file = UploadedFile(
+            filename=file.filename,
+            content=stored_content,
+            storage_format=STORAGE_FORMAT_PARQUET,
+            schema=schema,
+            profile=profile,
+            content_hash=content_hash(stored_content),
+            category=category,
+        )
         db.add(db_file)
         db.commit()
         db.refresh(db_file)
@@ -189,6 +450,13 @@ async def get_file(file_id: int, db: Session = Depends(get_db)):
     if not file.content:
         raise HTTPException(status_code=400, detail="File content is empty or missing")
 
+    if file.storage_format == STORAGE_FORMAT_PARQUET:
+        return {
+            "filename": file.filename,
+            "datetime": file.upload_datetime.isoformat(),
+            "content": stored_file_to_csv(file.content, file.storage_format),
+        }
+
     detected = chardet.detect(file.content)
     encoding = detected["encoding"]
     # if not encoding:
@@ -214,193 +482,350 @@ async def get_file(file_id: int, db: Session = Depends(get_db)):
     }
 
 
+@app.get("/get_file_profile/{file_id}")
+async def get_file_profile(file_id: int, db: Session = Depends(get_db)):
+    return await load_profile(file_id, db)
+
+
 @app.post("/preliminary_tests", response_model=PreliminaryTestResponse)
 async def preliminary_tests(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
     db: Session = Depends(get_db)
 ):
     try:
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile)
-                .filter(UploadedFile.id == file_id)
-                .first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
+        if file or not file_id:
+            result = run_preliminary_tests(await load_dataframe(file, file_id, db))
         else:
-            raise HTTPException(
-                status_code=400,
-                detail="Either file or file_id must be provided"
-            )
-
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-        result = run_preliminary_tests(df)
+            # Stored files are answered from their profile without reading the data
+            result = preliminary_tests_from_profile(await load_profile(file_id, db))
         return PreliminaryTestResponse(**result)
     except Exception as e:
         print(f"Error in preliminary_tests: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.post("/find_unique_ids", response_model=List[UniqueIDResponse])
+@app.post(
+    "/find_unique_ids",
+    response_model=Union[List[UniqueIDResponse], UniqueIDScreenedResponse],
+)
 async def find_unique_ids(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
+    fast: bool = False,
+    sample_size: Optional[int] = Query(None, ge=1),
+    seed: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     try:
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile)
-                .filter(UploadedFile.id == file_id)
-                .first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
+        if file or not file_id:
+            df = await load_dataframe(file, file_id, db)
+            excluded = 0
         else:
-            raise HTTPException(
-                status_code=400,
-                detail="Either file or file_id must be provided"
-            )
-
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-        result = findUniqueIDs(df.to_dict("records"))
-        return [
+            # Columns the stored profile rules out are neither loaded nor combined
+            profile = await load_profile(file_id, db)
+            columns = unique_id_candidates(profile)
+            df = (await load_dataframe(None, file_id, db, columns=columns))[columns]
+            excluded = profile["n_columns"] - len(columns)
+        result, screening = await run_in_threadpool(
+            findUniqueIDs,
+            df,
+            (UNIQUE_ID_SAMPLE_ROWS if sample_size is None else sample_size) if fast else None,
+            seed,
+            return_screening=True,
+        )
+        screening["excluded_by_profile"] = excluded
+        unique_ids = [
             UniqueIDResponse(
                 UniqueID=item["UniqueID"],
                 Numeric_DataTypes=item["Numeric_DataTypes"]
             )
             for item in result
         ]
+        if fast:
+            return UniqueIDScreenedResponse(unique_ids=unique_ids, screening=screening)
+        return unique_ids
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/unique_id_check", response_model=UniqueIDCheckResponse)
-async def unique_id_check(input_data: UniqueIDCheckInput):
+async def unique_id_check(
+    input_data: UniqueIDCheckInput, db: Session = Depends(get_db)
+):
     try:
-        df = pd.DataFrame(input_data.data)
-        result = uniqueIDcheck(df.to_dict("records"), input_data.columns)
-        return UniqueIDCheckResponse(result=result)
+        if input_data.file_id is not None:
+            df = await load_dataframe(
+                None, input_data.file_id, db, columns=input_data.columns
+            )
+        elif input_data.data is not None:
+            df = pd.DataFrame(input_data.data)
+        else:
+            raise ValueError("Either data or file_id must be provided")
+        if not input_data.fast:
+            return UniqueIDCheckResponse(result=uniqueIDcheck(df, input_data.columns))
+        result, screening = uniqueIDcheck(
+            df,
+            input_data.columns,
+            UNIQUE_ID_SAMPLE_ROWS if input_data.sample_size is None else input_data.sample_size,
+            input_data.seed,
+            return_screening=True,
+        )
+        return UniqueIDCheckResponse(
+            result=result, eliminated_by_sample=screening["eliminated"]
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def dedup_source(
+    file: UploadFile, file_id: int, db: Session
+) -> Tuple[str, Optional[UploadedFile]]:
+    """
+    Identify the uploaded or stored file to deduplicate by its content hash.
+
+    Uploads are hashed in blocks, without reading them into memory.
+
+    Returns:
+    Tuple[str, Optional[UploadedFile]]: Content hash, and the stored file
+        (content deferred) when reading from file_id.
+    """
+    if file:
+        digest = hashlib.blake2b(digest_size=16)
+        file.file.seek(0)
+        for block in iter(lambda: file.file.read(UPLOAD_SNIFF_BYTES), b""):
+            digest.update(block)
+        file.file.seek(0)
+        return digest.hexdigest(), None
+
+    if not file_id:
+        raise HTTPException(
+            status_code=400, detail="Either file or file_id must be provided"
+        )
+    stored_file = (
+        db.query(UploadedFile)
+        .options(defer(UploadedFile.content))
+        .filter(UploadedFile.id == file_id)
+        .first()
+    )
+    if not stored_file:
+        raise HTTPException(status_code=404, detail="File not found")
+    return stored_file.content_hash or content_hash(stored_file.content), stored_file
+
+
+def dedup_artifact_id(source_hash: str, input_model: DropExportDuplicatesInput) -> str:
+    """Return the id of the artifact holding the result of a deduplication request."""
+    uid_cols = (
+        [input_model.uidCol] if isinstance(input_model.uidCol, str) else input_model.uidCol
+    )
+    return params_hash(
+        "drop_export_duplicates",
+        {
+            "source": source_hash,
+            "uidCol": uid_cols,
+            "keptRow": input_model.keptRow.lower(),
+            "export": input_model.export,
+            # The chunked and in-memory engines are cached apart, so a difference
+            # between them never leaks from one to the other
+            "chunked": bool(input_model.chunksize),
+        },
+    )
+
+
+async def spool_dedup_source(
+    file: UploadFile, stored_file: Optional[UploadedFile], directory: str
+) -> Tuple[str, str]:
+    """
+    Copy the uploaded or stored file to disk so it can be read in chunks.
+
+    Args:
+    file (UploadFile): File uploaded with the request, takes precedence over stored_file.
+    stored_file (Optional[UploadedFile]): Previously stored file.
+    directory (str): Directory the copy is written to.
+
+    Returns:
+    Tuple[str, str]: Path and storage format of the copy.
+    """
+    if file:
+        path = os.path.join(directory, "source.csv")
+        file.file.seek(0)
+        with open(path, "wb") as output:
+            await run_in_threadpool(shutil.copyfileobj, file.file, output)
+        return path, STORAGE_FORMAT_CSV
+
+    storage_format = stored_file.storage_format or STORAGE_FORMAT_CSV
+    path = os.path.join(directory, f"source.{storage_format}")
+    with open(path, "wb") as output:
+        output.write(stored_file.content)
+    return path, storage_format
+
+
+def get_dedup_output(
+    artifact_id: str, data_type: str
+) -> Tuple[str, int, Optional[Dict[str, str]]]:
+    """
+    Return the path, row count and column dtypes of the unique or duplicate rows
+    of a deduplication artifact.
+    """
+    if data_type not in ["unique", "duplicate"]:
+        raise HTTPException(status_code=400, detail="Invalid data type")
+    meta = dedup_artifacts.get(artifact_id) if artifact_id.isalnum() else None
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+
+    path = dedup_artifacts.file(
+        artifact_id, DEDUP_UNIQUE_FILE if data_type == "unique" else DEDUP_DUPLICATE_FILE
+    )
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No {data_type} data available")
+    return path, meta[f"{data_type}_count"], meta.get("dtypes")
+
+
+def stream_dedup_output(
+    path: str,
+    stream_format: str,
+    offset: int,
+    limit: Optional[int],
+    dtypes: Optional[Dict[str, str]] = None,
+) -> Iterator[str]:
+    """Encode rows of a deduplication output as CSV or NDJSON text, one batch at a time."""
+    for i, batch in enumerate(iter_dedup_output(path, offset, limit, dtypes)):
+        if stream_format == "csv":
+            yield batch.to_csv(index=False, header=i == 0)
+        else:
+            yield batch.to_json(orient="records", lines=True).rstrip("\n") + "\n"
+
+
+def page_headers(total: int, offset: int, limit: Optional[int]) -> dict:
+    """Return the pagination headers of a page of rows."""
+    headers = {"X-Total-Count": str(total)}
+    if limit is not None and offset + limit < total:
+        headers["X-Next-Offset"] = str(offset + limit)
+    return headers
+
+
 @app.post(
     "/drop_export_duplicates",
     response_model=DropExportDuplicatesResponse
 )
 async def drop_export_duplicates(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
     input_data: str = Form(...),
     db: Session = Depends(get_db)
 ):
-    global last_processed_data
     try:
         input_params = json.loads(input_data)
         input_model = DropExportDuplicatesInput(**input_params)
 
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile)
-                .filter(UploadedFile.id == file_id)
-                .first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Either file or file_id must be provided"
-            )
-
-        df = pd.read_csv(
-            io.StringIO(contents.decode("utf-8")),
-            keep_default_na=False, na_values=[""]
-        )
-
-        unique_rows, duplicate_rows = dropExportDuplicates(
+        source_hash, stored_file = await dedup_source(file, file_id, db)
+        artifact_id = dedup_artifact_id(source_hash, input_model)
+
+        # Repeated requests for the same file and parameters are served from disk
+        meta = dedup_artifacts.get(artifact_id)
+        if meta is not None:
+            return DropExportDuplicatesResponse(**meta)
+
+        if input_model.chunksize:
+            # Stream the file through the chunked engine instead of parsing it whole
+            spool_dir = dedup_artifacts.staging_dir()
+            try:
+                source_path, storage_format = await spool_dedup_source(
+                    file, stored_file, spool_dir
+                )
+                meta = await run_in_threadpool(
+                    dedup_artifacts.build,
+                    artifact_id,
+                    dropExportDuplicatesFromFile,
+                    source_path,
+                    storage_format,
+                    input_model.uidCol,
+                    input_model.keptRow,
+                    input_model.export,
+                    input_model.chunksize,
+                )
+            finally:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+            return DropExportDuplicatesResponse(**meta)
+
+        # Parsed with pandas' default missing values, as stored files were at upload
+        df = await load_dataframe(file, file_id, db)
+
+        meta = await run_in_threadpool(
+            dedup_artifacts.build,
+            artifact_id,
+            writeExportDuplicates,
             df,
             input_model.uidCol,
             input_model.keptRow,
             input_model.export,
-            input_model.chunksize,
-        )
-
-        unique_count = len(unique_rows)
-        duplicate_count = len(duplicate_rows) if duplicate_rows is not None else 0
-        total_count = unique_count + duplicate_count
-        percent_duplicates = (
-            (duplicate_count / total_count) * 100 if total_count > 0 else 0
-        )
-
-        # Store the processed data
-        last_processed_data["unique_rows"] = pd.DataFrame(unique_rows)
-        last_processed_data["duplicate_rows"] = (
-            pd.DataFrame(duplicate_rows) if duplicate_rows is not None else None
-        )
-
-        return DropExportDuplicatesResponse(
-            unique_count=unique_count,
-            duplicate_count=duplicate_count,
-            percent_duplicates=percent_duplicates,
         )
+        return DropExportDuplicatesResponse(**meta)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/get_processed_data")
-async def get_processed_data(data_type: str = Query(...), filename: str = Query(...)):
-    global last_processed_data
-    if data_type not in ["unique", "duplicate"]:
-        raise HTTPException(status_code=400, detail="Invalid data type")
+async def get_processed_data(
+    artifact_id: str = Query(...),
+    data_type: str = Query(...),
+    filename: str = Query(...),
+    format: str = Query("csv"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=0),
+):
+    """Download the rows as CSV or NDJSON, optionally a page of them, streamed in batches."""
+    if format not in DEDUP_STREAM_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400, detail=f"format must be one of {', '.join(DEDUP_STREAM_MEDIA_TYPES)}"
+        )
+    path, total, dtypes = get_dedup_output(artifact_id, data_type)
+    headers = page_headers(total, offset, limit)
 
-    data = (
-        last_processed_data["unique_rows"]
-        if data_type == "unique"
-        else last_processed_data["duplicate_rows"]
-    )
+    if format == "csv" and offset == 0 and limit is None:
+        return FileResponse(path, media_type="text/csv", filename=filename, headers=headers)
 
-    if data is not None:
-        csv_data = data.to_csv(index=False)
-        return Response(
-            content=csv_data,
-            media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"},
-        )
-    else:
-        raise HTTPException(status_code=404, detail=f"No {data_type} data available")
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(
+        stream_dedup_output(path, format, offset, limit, dtypes),
+        media_type=DEDUP_STREAM_MEDIA_TYPES[format],
+        headers=headers,
+    )
 
 
 @app.get("/get_dataframe")
-async def get_dataframe(data_type: str = Query(...)):
-    global last_processed_data
-    if data_type not in ["unique", "duplicate"]:
-        raise HTTPException(status_code=400, detail="Invalid data type")
-
-    data = (
-        last_processed_data["unique_rows"]
-        if data_type == "unique"
-        else last_processed_data["duplicate_rows"]
-    )
+async def get_dataframe(
+    artifact_id: str = Query(...),
+    data_type: str = Query(...),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=0),
+    format: str = Query("json"),
+):
+    """
+    Return the rows as a JSON array of records, optionally a page of them.
+
+    X-Total-Count holds the number of rows and X-Next-Offset the offset of the
+    next page, if any. With format=ndjson the records are streamed one per line.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be one of json, ndjson")
+    path, total, dtypes = get_dedup_output(artifact_id, data_type)
+    headers = page_headers(total, offset, limit)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            stream_dedup_output(path, format, offset, limit, dtypes),
+            media_type=DEDUP_STREAM_MEDIA_TYPES[format],
+            headers=headers,
+        )
 
-    if data is not None:
-        return data.replace({np.nan: None, np.inf: None, -np.inf: None}).to_dict(
+    data = await run_in_threadpool(read_dedup_output, path, offset, limit, dtypes)
+    return JSONResponse(
+        content=data.replace({np.nan: None, np.inf: None, -np.inf: None}).to_dict(
             orient="records"
-        )
-    else:
-        raise HTTPException(status_code=404, detail=f"No {data_type} data available")
+        ),
+        headers=headers,
+    )
 
 
 @app.post("/drop_export_duplicate_rows", response_model=DropExportDuplicatesResponse)
@@ -408,68 +833,39 @@ async def drop_export_duplicate_rows(
     file: UploadFile = File(...), 
     # input_data: str = Form(...)
 ):
-    global last_processed_data
     try:
         # input_params = json.loads(input_data)
         # kept_row = input_params.get("keptRow", "first")
         # export = input_params.get("export", True)
 
         contents = await file.read()
-        df = pd.read_csv(
-            io.StringIO(contents.decode("utf-8")), keep_default_na=False, na_values=[""]
-        )
-
-        # Process duplicates
-        #if kept_row == "none":
-        unique_rows = df.drop_duplicates(keep=False)
-        duplicate_rows = df[df.duplicated(keep=False)]
-        # else:
-        #     unique_rows = df.drop_duplicates(keep=kept_row)
-        #     duplicate_rows = df[df.duplicated(keep=False)] if export else None
-
-        unique_count = len(unique_rows)
-        duplicate_count = len(duplicate_rows) if duplicate_rows is not None else 0
-        total_count = unique_count + duplicate_count
-        percent_duplicates = (
-            (duplicate_count / total_count) * 100 if total_count > 0 else 0
+        artifact_id = params_hash(
+            "drop_export_duplicate_rows", {"source": content_hash(contents)}
         )
+        meta = dedup_artifacts.get(artifact_id)
+        if meta is not None:
+            return DropExportDuplicatesResponse(**meta)
 
-        # Store the processed data
-        last_processed_data["unique_rows"] = unique_rows
-        last_processed_data["duplicate_rows"] = duplicate_rows
+        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
 
-        return DropExportDuplicatesResponse(
-            unique_count=unique_count,
-            duplicate_count=duplicate_count,
-            percent_duplicates=percent_duplicates,
+        # Rows duplicated across all columns are dropped entirely
+        meta = await run_in_threadpool(
+            dedup_artifacts.build, artifact_id, writeExportDuplicates, df, None, "none", True
         )
+        return DropExportDuplicatesResponse(**meta)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/missing_entries")
 async def missing_entries(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
     input_data: str = Form(...),
     db: Session = Depends(get_db),
 ):
     try:
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
-        else:
-            raise HTTPException(
-                status_code=400, detail="Either file or file_id must be provided"
-            )
-
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")), index_col=False)
+        df = await load_dataframe(file, file_id, db, index_col=False)
 
         # Parse the input data
         input_data = json.loads(input_data)
@@ -532,28 +928,13 @@ async def missing_entries(
 
 @app.post("/zero_entries")
 async def zero_entries(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
     input_data: str = Form(...),
     db: Session = Depends(get_db),
 ):
     try:
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
-        else:
-            raise HTTPException(
-                status_code=400, detail="Either file or file_id must be provided"
-            )
-
-        # Load the CSV file into a DataFrame
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+        df = await load_dataframe(file, file_id, db)
 
         # Parse the input data
         input_data = json.loads(input_data)
@@ -610,27 +991,13 @@ async def zero_entries(
 
 @app.post("/indicator_fill_rate")
 async def indicator_fill_rate(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
     input_data: str = Form(...),
     db: Session = Depends(get_db),
 ):
     try:
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
-        else:
-            raise HTTPException(
-                status_code=400, detail="Either file or file_id must be provided"
-            )
-
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+        df = await load_dataframe(file, file_id, db)
 
         # Parse the input data
         input_data = json.loads(input_data)
@@ -702,28 +1069,12 @@ async def indicator_fill_rate(
 
 @app.post("/frequency_table")
 async def frequency_table(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
     file_id: int = None,
     input_data: str = Form(...),
     db: Session = Depends(get_db),
 ):
     try:
-        if file:
-            contents = await file.read()
-        elif file_id:
-            stored_file = (
-                db.query(UploadedFile).filter(UploadedFile.id == file_id).first()
-            )
-            if not stored_file:
-                raise HTTPException(status_code=404, detail="File not found")
-            contents = stored_file.content
-        else:
-            raise HTTPException(
-                status_code=400, detail="Either file or file_id must be provided"
-            )
-
-        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-
         # Parse the input data
         input_data = json.loads(input_data)
         column_to_analyze = input_data["column_to_analyze"]
@@ -731,6 +1082,12 @@ async def frequency_table(
         group_by = input_data.get("group_by")
         filter_by = input_data.get("filter_by")
 
+        # Only the analysed, grouping and filter columns are needed
+        needed_columns = [column_to_analyze, group_by, *(filter_by or {}).keys()]
+        df = await load_dataframe(
+            file, file_id, db, columns=[col for col in needed_columns if col]
+        )
+
         # Validate input
         if column_to_analyze not in df.columns:
             raise ValueError(f"Column '{column_to_analyze}' not found in the dataset")
@@ -777,29 +1134,198 @@ async def check_errors(input_data: ErrorHandlingInput):
     return {"status": error_status, "message": error_message}
 
 
+async def run_cached_simulation(kind: str, simulator, params: dict, db: Session) -> dict:
+    """
+    Run a simulation, serving seeded requests from the result cache when possible.
+
+    Args:
+    kind (str): Name of the simulation, used as part of the cache key.
+    simulator (Callable[[dict], dict]): Function computing the response.
+    params (dict): Request parameters.
+    db (Session): Database session.
+
+    Returns:
+    dict: The simulation response.
+    """
+    if not result_cache.is_cacheable(params):
+        return await run_in_threadpool(simulator, params)
+
+    key = params_hash(kind, params)
+    cached = result_cache.get(db, kind, key)
+    if cached is not None:
+        return cached
+
+    result = await run_in_threadpool(simulator, params)
+    if result["status"] == 1:
+        try:
+            result_cache.put(db, kind, key, result)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not cache {kind} result: {e}")
+    return result
+
+
 @app.post("/l1-sample-size")
-async def calculate_l1_sample_size(input_data: L1SampleSizeInput):
-    result = l1_sample_size_calculator(input_data.dict())
+async def calculate_l1_sample_size(
+    input_data: L1SampleSizeInput, db: Session = Depends(get_db)
+):
+    result = await run_cached_simulation(
+        "l1-sample-size", l1_sample_size_calculator, input_data.dict(), db
+    )
     if result["status"] == 0:
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
 
-@app.post("/l2-sample-size")
-async def calculate_l2_sample_size(input_data: L2SampleSizeInput):
-    result = l2_sample_size_calculator(input_data.dict())
+@app.post("/l1-sample-size-sweep")
+async def calculate_l1_sample_size_sweep(
+    input_data: L1SampleSizeSweepInput, db: Session = Depends(get_db)
+):
+    result = await run_cached_simulation(
+        "l1-sample-size-sweep", l1_sample_size_sweep, input_data.dict(), db
+    )
     if result["status"] == 0:
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
 
-@app.post("/third-party-sampling")
-async def predict_third_party_sampling(input_data: ThirdPartySamplingInput):
-    result = third_party_sampling_strategy(input_data.dict())
+@app.post("/l2-sample-size")
+async def calculate_l2_sample_size(input_data: L2SampleSizeInput):
+    result = await run_in_threadpool(l2_sample_size_calculator, input_data.dict())
     if result["status"] == 0:
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
+
+def third_party_params(input_data: ThirdPartySamplingInput) -> dict:
+    """
+    Return the simulation parameters, drawing a seed if the request has none.
+
+    The seed is returned with the result so its figures can be requested later.
+    Only requests seeded by the client are cached, see
+    SimulationResultCache.is_cacheable.
+    """
+    params = input_data.dict()
+    if params["seed"] is None:
+        params["seed"] = new_seed()
+    return params
+
+
+def encode_third_party_sampling(params: dict, response_format: str) -> dict:
+    """Run the third-party simulation and encode its numeric results in a binary format."""
+    result = simulate_third_party_sampling(params)
+    if result["status"] == 0:
+        return result
+    return {"status": 1, "content": encode_arrays(result["value"], response_format)}
+
+
+@app.post("/third-party-sampling")
+async def predict_third_party_sampling(
+    input_data: ThirdPartySamplingInput,
+    request: Request,
+    format: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Simulate third-party sampling strategies.
+
+    Results are JSON unless a binary encoding of the numeric arrays is requested,
+    with format=npz|arrow or the matching Accept header.
+    """
+    try:
+        response_format = negotiate_format(format, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params = third_party_params(input_data)
+    # A drawn seed makes the run reproducible, but one-off requests are not cached
+    cacheable = result_cache.is_cacheable(input_data.dict())
+
+    if response_format == FORMAT_JSON:
+        if cacheable:
+            result = await run_cached_simulation(
+                "third-party-sampling", third_party_sampling_strategy, params, db
+            )
+        else:
+            result = await run_in_threadpool(third_party_sampling_strategy, params)
+        if result["status"] == 0:
+            raise HTTPException(status_code=400, detail=result["message"])
+        # Already JSON-native, so skip FastAPI's recursive encoder
+        return JSONResponse(content=result)
+
+    kind = f"third-party-sampling.{response_format}"
+    key = params_hash(kind, params)
+    content = result_cache.get_bytes(db, kind, key) if cacheable else None
+    if content is None:
+        result = await run_in_threadpool(encode_third_party_sampling, params, response_format)
+        if result["status"] == 0:
+            raise HTTPException(status_code=400, detail=result["message"])
+        content = result["content"]
+        if cacheable:
+            try:
+                result_cache.put_bytes(db, kind, key, content)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Could not cache {kind} result: {e}")
+    return Response(content=content, media_type=MEDIA_TYPES[response_format])
+
+
+@app.post("/third-party-sampling/figures/{name}")
+async def third_party_sampling_figure(
+    name: str,
+    input_data: ThirdPartySamplingInput,
+    format: str = Query("png"),
+    db: Session = Depends(get_db),
+):
+    """
+    Render a figure of a third-party sampling strategy.
+
+    The body is the request sent to /third-party-sampling, including the seed
+    returned with its result. Rendered figures are cached.
+    """
+    if name not in THIRD_PARTY_FIGURES:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown figure '{name}', expected one of {', '.join(THIRD_PARTY_FIGURES)}",
+        )
+    if format not in FIGURE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of {', '.join(FIGURE_FORMATS)}",
+        )
+    if input_data.seed is None:
+        raise HTTPException(
+            status_code=400,
+            detail="seed is required; use the seed returned by /third-party-sampling",
+        )
+
+    params = dict(input_data.dict(), include_figures=False)
+    figure_key = params_hash("third-party-figure", dict(params, figure=name, format=format))
+    content = result_cache.get_bytes(db, "third-party-figure", figure_key)
+    if content is None:
+        result = await run_cached_simulation(
+            "third-party-sampling", third_party_sampling_strategy, params, db
+        )
+        if result["status"] == 0:
+            raise HTTPException(status_code=400, detail=result["message"])
+        content = await run_in_threadpool(
+            render_third_party_figure, params, result["value"], name, format
+        )
+        try:
+            result_cache.put_bytes(db, "third-party-figure", figure_key, content)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not cache third-party figure: {e}")
+    return Response(content=content, media_type=FIGURE_MEDIA_TYPES[format])
+
+
+@app.get("/cache/metrics")
+async def cache_metrics(db: Session = Depends(get_db)):
+    return {
+        "dataframe_cache": dataframe_cache.stats(),
+        "result_cache": result_cache.stats(db),
+        "dedup_artifacts": dedup_artifacts.stats(),
+    }
+
 @app.post("/post_survey_analysis")
 async def post_survey_analysis(
     file: UploadFile = File(...),
@@ -827,8 +1353,128 @@ async def pseudo_code(
             raise HTTPException(status_code=400, detail="Please upload a CSV file.")
         contents = await file.read()
         df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
-        result = anganwadi_center_data_anaylsis(df)
+        result = await run_in_threadpool(anganwadi_center_data_anaylsis, df)
         return JSONResponse(content=result)
     except Exception as e:
         print(f"Error in pseudo_code_analysis: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/jobs/l1-sample-size", response_model=JobSubmitResponse)
+async def submit_l1_sample_size_job(input_data: L1SampleSizeInput):
+    job_id = job_manager.submit(
+        "l1-sample-size", l1_sample_size_calculator, input_data.dict()
+    )
+    return JobSubmitResponse(job_id=job_id, status=JOB_QUEUED)
+
+
+@app.post("/jobs/l1-sample-size-sweep", response_model=JobSubmitResponse)
+async def submit_l1_sample_size_sweep_job(input_data: L1SampleSizeSweepInput):
+    job_id = job_manager.submit(
+        "l1-sample-size-sweep", l1_sample_size_sweep, input_data.dict()
+    )
+    return JobSubmitResponse(job_id=job_id, status=JOB_QUEUED)
+
+
+@app.post("/jobs/third-party-sampling", response_model=JobSubmitResponse)
+async def submit_third_party_sampling_job(input_data: ThirdPartySamplingInput):
+    job_id = job_manager.submit(
+        "third-party-sampling",
+        third_party_sampling_strategy,
+        third_party_params(input_data),
+    )
+    return JobSubmitResponse(job_id=job_id, status=JOB_QUEUED)
+
+
+@app.post("/jobs/pseudo_code", response_model=JobSubmitResponse)
+async def submit_pseudo_code_job(file: UploadFile = File(...)):
+    if file.content_type != "text/csv":
+        raise HTTPException(status_code=400, detail="Please upload a CSV file.")
+    try:
+        contents = await file.read()
+        df = pd.read_csv(io.StringIO(contents.decode("utf-8")))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    job_id = job_manager.submit("pseudo_code", anganwadi_center_data_anaylsis, df)
+    return JobSubmitResponse(job_id=job_id, status=JOB_QUEUED)
+
+
+@app.post("/jobs/drop_export_duplicates", response_model=JobSubmitResponse)
+async def submit_drop_export_duplicates_job(
+    file: UploadFile = File(None),
+    file_id: int = None,
+    input_data: str = Form(...),
+    db: Session = Depends(get_db),
+):
+    """
+    Run chunked deduplication as a background job reporting its progress.
+
+    The job result holds the counts and the artifact_id the rows are fetched
+    with from /get_processed_data and /get_dataframe.
+    """
+    try:
+        input_model = DropExportDuplicatesInput(**json.loads(input_data))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    input_model.chunksize = input_model.chunksize or INGEST_CHUNK_ROWS
+
+    source_hash, stored_file = await dedup_source(file, file_id, db)
+    spool_dir = dedup_artifacts.staging_dir()
+    try:
+        source_path, storage_format = await spool_dedup_source(file, stored_file, spool_dir)
+    except Exception:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+        raise
+
+    job_id = job_manager.submit(
+        "drop_export_duplicates",
+        dedup_artifacts.build,
+        dedup_artifact_id(source_hash, input_model),
+        dropExportDuplicatesFromFile,
+        source_path,
+        storage_format,
+        input_model.uidCol,
+        input_model.keptRow,
+        input_model.export,
+        input_model.chunksize,
+    )
+    job_manager.get(job_id).future.add_done_callback(
+        lambda _: shutil.rmtree(spool_dir, ignore_errors=True)
+    )
+    return JobSubmitResponse(job_id=job_id, status=JOB_QUEUED)
+
+
+def get_job_or_404(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=MAX_JOB_WAIT_SECONDS),
+):
+    """Return the job status; with wait > 0, long-poll until it finishes or the wait expires."""
+    job = get_job_or_404(job_id)
+    await job_manager.wait(job, wait)
+    return JobStatusResponse(**job_manager.status(job))
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=MAX_JOB_WAIT_SECONDS),
+):
+    job = get_job_or_404(job_id)
+    await job_manager.wait(job, wait)
+    status = job_manager.status(job)
+    if status["status"] == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=status["error"])
+    if status["status"] != JOB_FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job is {status['status']}")
+
+    result = job.future.result()
+    if isinstance(result, dict) and result.get("status") == 0:
+        raise HTTPException(status_code=400, detail=result["message"])
+    return JSONResponse(content=result)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Tuple, Union
 
 
@@ -17,13 +17,30 @@ class UniqueIDResponse(BaseModel):
     Numeric_DataTypes: int
 
 
+class UniqueIDScreening(BaseModel):
+    sample_size: int
+    eliminated: Dict[str, int]
+    verified: Dict[str, int]
+    excluded_by_profile: int = 0
+
+
+class UniqueIDScreenedResponse(BaseModel):
+    unique_ids: List[UniqueIDResponse]
+    screening: UniqueIDScreening
+
+
 class UniqueIDCheckInput(BaseModel):
-    data: List[dict]
     columns: List[str]
+    file_id: Optional[int] = None
+    data: Optional[List[dict]] = None
+    fast: bool = False
+    sample_size: Optional[int] = Field(None, ge=1)
+    seed: Optional[int] = None
 
 
 class UniqueIDCheckResponse(BaseModel):
     result: Tuple[str, bool]
+    eliminated_by_sample: Optional[bool] = None
 
 
 class FileUpload(BaseModel):
@@ -41,6 +58,7 @@ class DropExportDuplicatesResponse(BaseModel):
     unique_count: int
     duplicate_count: int
     percent_duplicates: float
+    artifact_id: Optional[str] = None
 
 
 class MissingEntriesInput(BaseModel):
@@ -69,6 +87,29 @@ class L1SampleSizeInput(BaseModel):
     mean_disc: float
     std_disc: float
     distribution: str
+    seed: Optional[int] = None
+    workers: int = 1
+    early_stopping_alpha: Optional[float] = None
+
+
+class L1SampleSizeSweepInput(BaseModel):
+    min_n_samples: int
+    max_n_samples: int
+    n_subs_per_block: int
+    n_blocks_per_district: int
+    n_district: int
+    level_test: str
+    percent_punish: List[float]
+    percent_guarantee: List[float]
+    confidence: List[float]
+    n_simulations: int
+    min_disc: float
+    max_disc: float
+    mean_disc: float
+    std_disc: float
+    distribution: str
+    seed: Optional[int] = None
+    workers: int = 1
 
 
 class L2SampleSizeInput(BaseModel):
@@ -82,6 +123,8 @@ class L2SampleSizeInput(BaseModel):
     n_district: int
     n_simulations: int
     min_sub_per_block: int
+    seed: Optional[int] = None
+    mode: str = "sample"
 
 
 class ThirdPartySamplingInput(BaseModel):
@@ -98,3 +141,22 @@ class ThirdPartySamplingInput(BaseModel):
     percent_blocks_plot: float
     errorbar_type: str
     n_blocks_reward: int
+    seed: Optional[int] = None
+    workers: int = 1
+    include_figures: bool = False
+    include_meas_order: bool = True
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    progress: int
+    submitted_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
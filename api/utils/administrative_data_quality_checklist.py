@@ -1,8 +1,21 @@
+import os
+import tempfile
 import numpy as np
 import pandas as pd
+from contextlib import ExitStack
 from itertools import combinations
-from typing import Union, List, Tuple, Optional, Dict
+from math import comb
+from typing import Any, Callable, Iterable, Iterator, Union, List, Tuple, Optional, Dict
 from scipy.stats import binom
+from api.utils.file_storage import (
+    STORAGE_FORMAT_PARQUET,
+    csv_file_to_parquet,
+    stored_file_chunks,
+    stored_file_dtypes,
+    stored_file_rows,
+)
+from api.utils.key_index import HashedKeyIndex, ROW_DUPLICATED, ROW_KEPT, hash_keys
+from api.utils.profiling import profile_dataframe
 
 def run_preliminary_tests(df: pd.DataFrame) -> Dict[str, Union[int, str, List[str]]]:
     """
@@ -11,34 +24,49 @@ def run_preliminary_tests(df: pd.DataFrame) -> Dict[str, Union[int, str, List[st
     Args:
     df (pd.DataFrame): The input dataframe
 
+    Returns:
+    Dict[str, Union[int, str, List[str]]]: A dictionary containing test results
+    """
+    return preliminary_tests_from_profile(profile_dataframe(df))
+
+
+def preliminary_tests_from_profile(
+    profile: Dict,
+) -> Dict[str, Union[int, str, List[str]]]:
+    """
+    Run the preliminary tests on the stored profile of a dataset, without reading it.
+
+    Args:
+    profile (Dict): Profile computed by profile_dataframe or DataProfiler
+
     Returns:
     Dict[str, Union[int, str, List[str]]]: A dictionary containing test results
     """
     results = {"status": 0, "error_code": None, "message": "Success", "warnings": []}
 
     # Check if the dataset has more than one column
-    if df.shape[1] == 1:
+    if profile["n_columns"] == 1:
         results["status"] = 2
         results["error_code"] = 1
         results["message"] = "The uploaded dataset only has 1 column"
         return results
 
     # Check if the dataset has at least two rows
-    if df.shape[0] < 2:
+    if profile["n_rows"] < 2:
         results["status"] = 2
         results["error_code"] = 2
         results["message"] = "The uploaded dataset has less than 2 rows"
         return results
 
     # Check for missing values
-    missing_columns = df.columns[df.isnull().any()].tolist()
+    missing_columns = [col["name"] for col in profile["columns"] if col["null_count"] > 0]
     if missing_columns:
         results["warnings"].append(
             f"The following columns have missing values: {', '.join(missing_columns)}"
         )
 
     # Check for duplicate rows
-    duplicate_count = df.duplicated().sum()
+    duplicate_count = profile["duplicate_rows"]
     if duplicate_count > 0:
         results["warnings"].append(
             f"The dataset contains {duplicate_count} duplicate rows"
@@ -47,7 +75,213 @@ def run_preliminary_tests(df: pd.DataFrame) -> Dict[str, Union[int, str, List[st
     return results
 
 
-def findUniqueIDs(data: List[Dict]) -> List[Dict[str, Union[List[str], int]]]:
+# Rows searched first for duplicate keys; the prefix grows by this factor until
+# MIN_COLLISIONS duplicates are found or every row has been searched
+COLLISION_PREFIX_ROWS = 4096
+COLLISION_PREFIX_GROWTH = 4
+
+# Duplicate rows of a column pair kept to rule out its 3-column combinations
+MIN_COLLISIONS = 32
+MAX_COLLISIONS = 256
+
+# Upper bound on the keys of 3-column combinations built in one NumPy call
+MAX_KEYS_PER_BATCH = 2**24
+
+# Rows of the random sample candidates are first checked on in fast mode
+UNIQUE_ID_SAMPLE_ROWS = 100_000
+
+# Relative margin added to estimated distinct counts before they rule out a
+# column, about six standard errors of the HyperLogLog sketch
+CARDINALITY_SCREEN_MARGIN = 0.05
+
+
+def factorize_columns(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encode every column of the dataframe as integer codes.
+
+    Args:
+    df (pd.DataFrame): The input dataframe
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray, np.ndarray]: The codes, with one column per column of df
+    and -1 for missing values, the number of distinct values of every column and whether
+    it has missing values.
+    """
+    n_rows, n_cols = df.shape
+    # Column-major, since combinations are built column by column
+    codes = np.empty((n_rows, n_cols), dtype=np.int32 if n_rows < 2**31 else np.int64, order="F")
+    n_unique = np.zeros(n_cols, dtype=np.int64)
+    for i in range(n_cols):
+        col_codes, uniques = pd.factorize(df.iloc[:, i])
+        codes[:, i] = col_codes
+        n_unique[i] = len(uniques)
+    has_missing = (codes < 0).any(axis=0)
+    return codes, n_unique, has_missing
+
+
+def combine_codes(left: np.ndarray, right: np.ndarray, n_right: int) -> np.ndarray:
+    """Return int64 keys that are equal for two rows iff both of their codes are."""
+    return left.astype(np.int64) * n_right + right
+
+
+def find_collisions(
+    keys: np.ndarray, min_pairs: int = MIN_COLLISIONS, max_pairs: int = MAX_COLLISIONS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find rows sharing a key, stopping at the first prefix of the rows that has enough.
+
+    Args:
+    keys (np.ndarray): Integer key of every row.
+    min_pairs (int): Number of pairs of rows after which the search stops.
+    max_pairs (int): Maximum number of pairs of rows returned.
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: Indices of the first and second row of pairs of rows
+    with equal keys, empty when all keys are distinct.
+    """
+    n_rows = len(keys)
+    n_searched = min(COLLISION_PREFIX_ROWS, n_rows)
+    while True:
+        order = np.argsort(keys[:n_searched], kind="stable")
+        sorted_keys = keys[order]
+        duplicates = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1])[:max_pairs]
+        if duplicates.size >= min_pairs or n_searched == n_rows:
+            return order[duplicates], order[duplicates + 1]
+        n_searched = min(n_searched * COLLISION_PREFIX_GROWTH, n_rows)
+
+
+def find_unique_combinations(
+    codes: np.ndarray, n_unique: np.ndarray, candidates: np.ndarray
+) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int, int]]]:
+    """
+    Find the combinations of 2 and 3 candidate columns whose values are unique in every row.
+
+    Pairs are searched for duplicates in a growing prefix of the rows, and the
+    duplicates found rule out the third columns that do not separate them.
+    Combinations whose product of distinct value counts is below the number of rows
+    are skipped, and the remaining 3-column combinations are only checked on the rows
+    duplicated on one of their pairs.
+
+    Args:
+    codes (np.ndarray): Codes of every column, as returned by factorize_columns.
+    n_unique (np.ndarray): Number of distinct values of every column.
+    candidates (np.ndarray): Positions of the columns to combine, which must not have
+    missing values.
+
+    Returns:
+    Tuple[List[Tuple[int, int]], List[Tuple[int, int, int]]]: Positions of the columns of
+    the unique pairs and of the unique 3-column combinations, in lexicographic order.
+    """
+    n_rows = codes.shape[0]
+    codes, n_unique = np.asfortranarray(codes[:, candidates]), n_unique[candidates]
+    n_candidates = len(candidates)
+
+    # Whether every duplicate found for a pair is separated by each third column; a
+    # 3-column combination is unique only if this holds for all three of its pairs
+    is_unique_pair = np.zeros((n_candidates, n_candidates), dtype=bool)
+    separates = np.zeros((n_candidates, n_candidates, n_candidates), dtype=bool)
+    for a, b in combinations(range(n_candidates), 2):
+        # Products are taken in floating point, they can overflow int64
+        n_pair_bound = min(float(n_unique[a]) * n_unique[b], n_rows)
+        if n_pair_bound * n_unique.max(initial=0) < n_rows:
+            continue
+        first_rows, second_rows = find_collisions(combine_codes(codes[:, a], codes[:, b], n_unique[b]))
+        if first_rows.size == 0:
+            is_unique_pair[a, b] = is_unique_pair[b, a] = True
+            continue
+        separates[a, b] = separates[b, a] = (codes[first_rows] != codes[second_rows]).all(axis=0)
+
+    unique_pairs, unique_triples, to_check = [], [], []
+    for a, b in combinations(range(n_candidates), 2):
+        if is_unique_pair[a, b]:
+            # Any superset of a unique pair is unique as well
+            unique_pairs.append((a, b))
+            unique_triples.extend((a, b, c) for c in range(b + 1, n_candidates))
+            continue
+
+        rest = np.arange(b + 1, n_candidates)
+        is_unique = is_unique_pair[a, rest] | is_unique_pair[b, rest]
+        unique_triples.extend((a, b, c) for c in rest[is_unique])
+        remaining = rest[
+            ~is_unique
+            & separates[a, b, rest]
+            & separates[a, rest, b]
+            & separates[b, rest, a]
+            & (min(float(n_unique[a]) * n_unique[b], n_rows) * n_unique[rest] >= n_rows)
+        ]
+        to_check.extend((a, b, c) for c in remaining)
+
+    unique_triples += check_triples(codes, n_unique, to_check)
+    unique_triples.sort()
+
+    unique_pairs = [tuple(int(candidates[i]) for i in combo) for combo in unique_pairs]
+    unique_triples = [tuple(int(candidates[i]) for i in combo) for combo in unique_triples]
+    return unique_pairs, unique_triples
+
+
+def check_triples(
+    codes: np.ndarray, n_unique: np.ndarray, triples: List[Tuple[int, int, int]]
+) -> List[Tuple[int, int, int]]:
+    """
+    Check which 3-column combinations are unique.
+
+    A combination is checked on the rows duplicated on its two columns with the most
+    distinct values, which are likely the fewest, together with every other
+    combination sharing that pair.
+
+    Args:
+    codes (np.ndarray): Codes of every column, as returned by factorize_columns.
+    n_unique (np.ndarray): Number of distinct values of every column.
+    triples (List[Tuple[int, int, int]]): Positions of the columns of the combinations.
+
+    Returns:
+    List[Tuple[int, int, int]]: The unique combinations, with sorted positions.
+    """
+    n_rows = codes.shape[0]
+    by_pair: Dict[Tuple[int, int], List[int]] = {}
+    for triple in triples:
+        first, second, third = sorted(triple, key=lambda i: n_unique[i], reverse=True)
+        by_pair.setdefault((min(first, second), max(first, second)), []).append(third)
+
+    unique_triples = []
+    for (a, b), thirds in by_pair.items():
+        keys = combine_codes(codes[:, a], codes[:, b], n_unique[b])
+        pair_codes, pair_uniques = pd.factorize(keys)
+        thirds = np.array(thirds)
+        thirds = thirds[float(len(pair_uniques)) * n_unique[thirds] >= n_rows]
+        if thirds.size == 0:
+            continue
+
+        # Only rows duplicated on the pair can be duplicated on a triple
+        duplicated = np.flatnonzero(np.bincount(pair_codes)[pair_codes] > 1)
+        if duplicated.size == 0:
+            unique_triples.extend(tuple(sorted((a, b, int(c)))) for c in thirds)
+            continue
+        duplicated_pair_codes = pair_codes[duplicated]
+        batch_size = max(1, MAX_KEYS_PER_BATCH // len(duplicated))
+        for start in range(0, thirds.size, batch_size):
+            batch = thirds[start:start + batch_size]
+            triple_keys = combine_codes(
+                duplicated_pair_codes[:, None], codes[:, batch][duplicated], n_unique[batch]
+            )
+            triple_keys.sort(axis=0)
+            is_unique = ~(triple_keys[1:] == triple_keys[:-1]).any(axis=0)
+            unique_triples.extend(tuple(sorted((a, b, int(c)))) for c in batch[is_unique])
+    return unique_triples
+
+
+def sample_rows(n_rows: int, sample_size: int, seed: Optional[int] = None) -> np.ndarray:
+    """Return the sorted positions of sample_size rows drawn at random without replacement."""
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_rows, size=sample_size, replace=False))
+
+
+def findUniqueIDs(
+    data: Union[pd.DataFrame, List[Dict]],
+    sample_size: Optional[int] = None,
+    seed: Optional[int] = None,
+    return_screening: bool = False,
+) -> Union[List[Dict[str, Union[List[str], int]]], Tuple[List[Dict[str, Union[List[str], int]]], Dict]]:
     """
     Find unique identifiers in the given dataset, excluding combinations with pre-existing unique IDs.
 
@@ -55,17 +289,29 @@ def findUniqueIDs(data: List[Dict]) -> List[Dict[str, Union[List[str], int]]]:
     or combinations that can be used as unique identifiers, sorted by length
     and number of numeric data types.
 
+    Every column is encoded as integer codes once and combinations are checked on
+    arithmetic combinations of the codes, see find_unique_combinations.
+
+    With sample_size, candidates are first searched on that many rows drawn at random:
+    a duplicate among them proves that a candidate is not unique, so only the candidates
+    unique on the sample are checked on the whole dataset. The result is the same.
+
     Args:
-    data (List[Dict]): The input dataset as a list of dictionaries.
+    data (Union[pd.DataFrame, List[Dict]]): The input dataset, as a DataFrame or a list of dictionaries.
+    sample_size (Optional[int]): Number of rows of the sample, None to check every candidate
+    on the whole dataset.
+    seed (Optional[int]): Seed of the sample.
+    return_screening (bool): Also return how many candidates the sample ruled out.
 
     Returns:
     List[Dict[str, Union[List[str], int]]]: A list of dictionaries containing unique IDs
     and their numeric datatype count, sorted by length and number of numeric data types.
+    With return_screening, a tuple of this list and a dictionary with the number of rows
+    of the sample and, by number of columns, the number of candidates ruled out by the
+    sample ("eliminated") and checked on the whole dataset ("verified").
     """
-    # Convert input data to DataFrame
-    df = pd.DataFrame(data)
-    uniqueIDcols = []
-    single_unique_cols = set()
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    n_rows, n_cols = df.shape
 
     def get_column_with_dtype(column: str) -> str:
         """Get column name with its datatype in brackets."""
@@ -77,77 +323,213 @@ def findUniqueIDs(data: List[Dict]) -> List[Dict[str, Union[List[str], int]]]:
         else:
             return f"{column} (other)"
 
-    def count_numeric_datatypes(columns: List[str]) -> int:
-        """Count the number of numeric datatypes in given columns."""
-        return sum(df[col].dtype in ["int64", "float64"] for col in columns)
+    labels = [get_column_with_dtype(col) for col in df.columns]
+    is_numeric = [df[col].dtype in ["int64", "float64"] for col in df.columns]
 
-    # Check individual columns first
-    for col in df.columns:
-        if df[col].nunique() == len(df):
-            uniqueIDcols.append(
-                {"UniqueID": [get_column_with_dtype(col)], "Numeric_DataTypes": count_numeric_datatypes([col])}
-            )
-            single_unique_cols.add(col)
-
-    # Check combinations of 2 and 3 columns, excluding those with pre-existing unique IDs
-    for r in range(2, 4):
-        for combo in combinations(df.columns, r):
-            if not any(col in single_unique_cols for col in combo):
-                if df.groupby(list(combo)).ngroups == len(df):
-                    num_numeric_datatypes = count_numeric_datatypes(combo)
-                    uniqueIDcols.append(
-                        {
-                            "UniqueID": [get_column_with_dtype(col) for col in combo],
-                            "Numeric_DataTypes": num_numeric_datatypes,
-                        }
-                    )
+    if sample_size is None or sample_size >= n_rows:
+        codes, n_unique, has_missing = factorize_columns(df)
+
+        # Check individual columns first
+        is_single_unique = (n_unique == n_rows) & ~has_missing
+
+        # Check combinations of 2 and 3 columns, excluding those with pre-existing unique IDs.
+        # Rows with missing values are dropped when grouping, so such columns never qualify.
+        candidates = np.flatnonzero(~is_single_unique & ~has_missing)
+        unique_pairs, unique_triples = find_unique_combinations(codes, n_unique, candidates)
+        screening = {
+            "sample_size": n_rows,
+            "eliminated": {"1": 0, "2": 0, "3": 0},
+            "verified": {"1": n_cols, "2": comb(len(candidates), 2), "3": comb(len(candidates), 3)},
+        }
+    else:
+        rows = sample_rows(n_rows, sample_size, seed)
+        sample_codes, sample_n_unique, sample_missing = factorize_columns(df.iloc[rows])
+
+        # Columns unique on the sample are checked on the whole dataset
+        possible_singles = np.flatnonzero((sample_n_unique == sample_size) & ~sample_missing)
+        is_single_unique = np.zeros(n_cols, dtype=bool)
+        for i in possible_singles:
+            column = df.iloc[:, i]
+            is_single_unique[i] = column.nunique() == n_rows and not column.isna().any()
+
+        # So are the combinations unique on the sample
+        candidates = np.flatnonzero(~is_single_unique & ~sample_missing)
+        sample_pairs, sample_triples = find_unique_combinations(sample_codes, sample_n_unique, candidates)
+        verified = sorted({i for combo in sample_pairs + sample_triples for i in combo})
+        codes, n_unique, has_missing = factorize_columns(df.iloc[:, verified])
+        position = {col: i for i, col in enumerate(verified)}
+        has_missing = {col: has_missing[i] for col, i in position.items()}
+
+        unique_pairs = [
+            (a, b)
+            for a, b in sample_pairs
+            if not has_missing[a]
+            and not has_missing[b]
+            and find_collisions(
+                combine_codes(codes[:, position[a]], codes[:, position[b]], n_unique[position[b]]),
+                min_pairs=1,
+            )[0].size == 0
+        ]
+        is_unique_pair = set(unique_pairs)
+        unique_triples, to_check = [], []
+        for combo in sample_triples:
+            if any(has_missing[i] for i in combo):
+                continue
+            if any(pair in is_unique_pair for pair in combinations(combo, 2)):
+                # Any superset of a unique pair is unique as well
+                unique_triples.append(combo)
+            else:
+                to_check.append(tuple(position[i] for i in combo))
+        unique_triples += [
+            tuple(verified[i] for i in combo) for combo in check_triples(codes, n_unique, to_check)
+        ]
+        unique_triples.sort()
+
+        screening = {
+            "sample_size": sample_size,
+            "eliminated": {
+                "1": n_cols - len(possible_singles),
+                "2": comb(len(candidates), 2) - len(sample_pairs),
+                "3": comb(len(candidates), 3) - len(sample_triples),
+            },
+            "verified": {"1": len(possible_singles), "2": len(sample_pairs), "3": len(sample_triples)},
+        }
+
+    uniqueIDcols = []
+    unique_singles = [(i,) for i in np.flatnonzero(is_single_unique)]
+    for combo in unique_singles + unique_pairs + unique_triples:
+        uniqueIDcols.append(
+            {
+                "UniqueID": [labels[i] for i in combo],
+                "Numeric_DataTypes": sum(is_numeric[i] for i in combo),
+            }
+        )
 
     # Sort the results by length of UniqueID and number of numeric datatypes
-    return sorted(
+    uniqueIDcols = sorted(
         uniqueIDcols, key=lambda x: (len(x["UniqueID"]), -x["Numeric_DataTypes"])
     )
+    if return_screening:
+        return uniqueIDcols, screening
+    return uniqueIDcols
+
+
+def unique_id_candidates(profile: Dict) -> List[str]:
+    """
+    Return the columns of a profiled dataset that may be part of a unique ID.
+
+    A column or combination of up to 3 columns can only be unique if none of its
+    columns has missing values and the product of their distinct value counts
+    reaches the number of rows. Columns that fail this with the largest other
+    counts are left out; findUniqueIDs on the remaining columns finds the same
+    unique IDs. Estimated distinct counts are raised by CARDINALITY_SCREEN_MARGIN
+    first, so that a column is only ruled out when the exact count would be too.
 
+    Args:
+    profile (Dict): Profile of the dataset, see api.utils.profiling.DataProfiler
 
-def uniqueIDcheck(data: List[Dict], colsList: List[str]) -> Tuple[str, bool]:
+    Returns:
+    List[str]: Names of the remaining columns, in the order of the dataset.
+    """
+    n_rows = profile["n_rows"]
+    bounds = {}
+    for column in profile["columns"]:
+        if column["null_count"] > 0:
+            continue
+        count = float(column["distinct_count"])
+        if not column["distinct_exact"]:
+            count = min(count * (1 + CARDINALITY_SCREEN_MARGIN), n_rows)
+        bounds[column["name"]] = count
+
+    largest = sorted(bounds.values(), reverse=True)[:3]
+    candidates = []
+    for name, bound in bounds.items():
+        others = list(largest)
+        if bound in others:
+            others.remove(bound)
+        # Products are taken in floating point, they can overflow int64
+        if bound * np.prod(others[:2]) >= n_rows:
+            candidates.append(name)
+    return candidates
+
+
+def uniqueIDcheck(
+    data: Union[pd.DataFrame, List[Dict]],
+    colsList: List[str],
+    sample_size: Optional[int] = None,
+    seed: Optional[int] = None,
+    return_screening: bool = False,
+) -> Union[Tuple[str, bool], Tuple[Tuple[str, bool], Dict]]:
     """
     Check if selected columns form a unique identifier in the dataset.
 
     This function verifies if the selected column(s) can serve as a unique identifier
     for the given dataset.
 
+    With sample_size, the columns are first checked on that many rows drawn at random;
+    the whole dataset is only checked when they are unique on the sample.
+
     Args:
-    data (List[Dict]): The input dataset as a list of dictionaries.
+    data (Union[pd.DataFrame, List[Dict]]): The input dataset, as a DataFrame or a list of dictionaries.
     colsList (List[str]): List of column names to check for uniqueness.
+    sample_size (Optional[int]): Number of rows of the sample, None to check the whole dataset only.
+    seed (Optional[int]): Seed of the sample.
+    return_screening (bool): Also return whether the sample ruled the columns out.
 
     Returns:
     Tuple[str, bool]: A tuple containing the result message and a boolean indicating
-    whether the selected columns can work as a unique ID.
+    whether the selected columns can work as a unique ID. With return_screening, a tuple
+    of this tuple and a dictionary with the number of rows of the sample ("sample_size",
+    None when no sample was checked) and whether a duplicate was found in it ("eliminated").
     """
+    screening = {"sample_size": None, "eliminated": False}
+
+    def respond(message: str, is_unique: bool):
+        return ((message, is_unique), screening) if return_screening else (message, is_unique)
+
     # Input validation
     if not colsList:
-        return "No columns selected", False
+        return respond("No columns selected", False)
 
     if len(colsList) > 4:
-        return "You have selected more than 4 columns", False
+        return respond("You have selected more than 4 columns", False)
 
-    # Convert input data to DataFrame
-    df = pd.DataFrame(data)
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
 
     # Check if all selected columns are in the dataframe
     if not set(colsList).issubset(df.columns):
-        return "Selected Column(s) are not in the dataframe uploaded", False
+        return respond("Selected Column(s) are not in the dataframe uploaded", False)
+
+    # A duplicate in a sample is a duplicate in the whole dataset
+    if sample_size is not None and sample_size < len(df):
+        sample = df[colsList].iloc[sample_rows(len(df), sample_size, seed)]
+        screening["sample_size"] = sample_size
+        screening["eliminated"] = bool(sample.duplicated().any())
 
     # Check for uniqueness
-    if len(colsList) == 1:
+    if screening["eliminated"]:
+        is_unique = False
+    elif len(colsList) == 1:
         is_unique = df[colsList[0]].is_unique
     else:
         is_unique = df.duplicated(subset=colsList).sum() == 0
 
     # Return result
     if is_unique:
-        return "Selected column(s) can work as unique ID", True
+        return respond("Selected column(s) can work as unique ID", True)
     else:
-        return "Selected column(s) cannot work as unique ID", False
+        return respond("Selected column(s) cannot work as unique ID", False)
+
+
+# Files written by dropExportDuplicatesFromFile and writeExportDuplicates
+DEDUP_UNIQUE_FILE = "unique.csv"
+DEDUP_DUPLICATE_FILE = "duplicate.csv"
+
+# Rows read at a time when streaming those files back
+DEDUP_BATCH_ROWS = 10_000
+
+# Dtypes those files are read back with; columns of any other dtype are read as str
+DEDUP_READ_DTYPES = ("int64", "uint64", "float64", "bool")
 
 
 def dropExportDuplicates(
@@ -156,61 +538,418 @@ def dropExportDuplicates(
     keptRow: str = "first",
     export: bool = True,
     chunksize: Optional[int] = None,
-) -> Tuple[List[Dict], Optional[List[Dict]]]:
-    if isinstance(df1, str):
-        if chunksize:
-            return process_in_chunks(df1, uidCol, keptRow, export, chunksize)
-        else:
-            df1 = pd.read_csv(df1, keep_default_na=False, na_values=[""])
-
-    df1 = df1.replace([np.inf, -np.inf], np.nan)
-
-    keep_param = False if keptRow.lower() == "none" else keptRow.lower()
+    indices_only: bool = False,
+) -> Tuple[List, Optional[List]]:
+    """
+    Drop duplicates on the uid column(s) and export the duplicated rows.
 
-    is_duplicate = df1.duplicated(subset=uidCol, keep=False)
-    df_unique = df1[~df1.duplicated(subset=uidCol, keep=keep_param)]
-    df_dupl = df1[is_duplicate] if export else None
+    Args:
+    df1 (Union[pd.DataFrame, str]): Input dataframe, or path of a CSV file
+    uidCol (Union[str, List[str]]): Column(s) identifying a row
+    keptRow (str): "first", "last" or "none" (drop every duplicated key)
+    export (bool): Whether to return the duplicated rows
+    chunksize (Optional[int]): Read a CSV path in chunks of this many rows
+    indices_only (bool): Return the row positions instead of the rows as records,
+        which avoids building a dict per row when only counts are needed
 
+    Returns:
+    Tuple[List, Optional[List]]: Kept rows and, when exporting, every row whose key
+    is duplicated
+    """
     def safe_convert(df):
         return df.replace({np.nan: None, np.inf: None, -np.inf: None}).to_dict(
             "records"
         )
 
+    if isinstance(df1, str) and chunksize:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            parquet_path = csv_file_to_parquet(df1, tmpdir, chunksize)
+
+            def source():
+                return stored_file_chunks(parquet_path, STORAGE_FORMAT_PARQUET, chunksize)
+
+            if indices_only:
+                keep_param = False if keptRow.lower() == "none" else keptRow.lower()
+                with HashedKeyIndex() as index:
+                    for chunk in finite_chunks(source()):
+                        index.add(hash_keys(chunk, uidCol))
+                    status = index.resolve(keep_param)
+                    return (
+                        np.flatnonzero(status & ROW_KEPT).tolist(),
+                        np.flatnonzero(status & ROW_DUPLICATED).tolist() if export else None,
+                    )
+
+            unique_path = os.path.join(tmpdir, "unique.csv")
+            duplicate_path = os.path.join(tmpdir, "duplicate.csv") if export else None
+            process_in_chunks(source, uidCol, keptRow, export, unique_path, duplicate_path)
+            dtypes = stored_file_dtypes(parquet_path, STORAGE_FORMAT_PARQUET)
+            return (
+                safe_convert(read_dedup_output(unique_path, dtypes=dtypes)),
+                safe_convert(read_dedup_output(duplicate_path, dtypes=dtypes)) if export else None,
+            )
+    if isinstance(df1, str):
+        df1 = pd.read_csv(df1)
+
+    if indices_only:
+        kept, duplicated = duplicate_masks(
+            df1.replace([np.inf, -np.inf], np.nan), uidCol, keptRow
+        )
+        return (
+            np.flatnonzero(kept).tolist(),
+            np.flatnonzero(duplicated).tolist() if export else None,
+        )
+
+    df_unique, df_dupl = split_duplicates(df1, uidCol, keptRow, export)
+
     unique_rows = safe_convert(df_unique)
     duplicate_rows = safe_convert(df_dupl) if df_dupl is not None else None
 
     return unique_rows, duplicate_rows
 
 
+def split_duplicates(
+    df: pd.DataFrame,
+    uidCol: Optional[Union[str, List[str]]],
+    keptRow: str,
+    export: bool,
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Split a dataframe into its kept rows and, when exporting, its duplicated rows.
+
+    Args:
+    df (pd.DataFrame): Input dataframe
+    uidCol (Optional[Union[str, List[str]]]): Column(s) identifying a row, all columns when None
+    keptRow (str): "first", "last" or "none"
+    export (bool): Whether to return the duplicated rows
+
+    Returns:
+    Tuple[pd.DataFrame, Optional[pd.DataFrame]]: Kept rows and duplicated rows
+    """
+    df = df.replace([np.inf, -np.inf], np.nan)
+
+    kept, duplicated = duplicate_masks(df, uidCol, keptRow)
+    df_unique = df[kept]
+    df_dupl = df[duplicated] if export else None
+    return df_unique, df_dupl
+
+
+def group_ids(df: pd.DataFrame) -> Tuple[np.ndarray, int]:
+    """
+    Number the distinct rows of a dataframe.
+
+    Missing values are equal to each other, as in DataFrame.duplicated.
+
+    Args:
+    df (pd.DataFrame): The key columns
+
+    Returns:
+    Tuple[np.ndarray, int]: Group id of every row, and an upper bound of the ids
+    """
+    codes, n_unique, _ = factorize_columns(df)
+    n_rows = len(df)
+    # Shifted so that missing values (-1) get a code of their own
+    ids = codes[:, 0].astype(np.int64) + 1
+    n_groups = int(n_unique[0]) + 1
+    for i in range(1, codes.shape[1]):
+        radix = int(n_unique[i]) + 1
+        if n_groups * radix >= 2**62:
+            ids, uniques = pd.factorize(ids)
+            n_groups = len(uniques)
+        ids = combine_codes(ids, codes[:, i] + 1, radix)
+        n_groups *= radix
+    # Keys spread over far more values than rows would make the counts sparse
+    if n_groups > 2 * n_rows:
+        ids, uniques = pd.factorize(ids)
+        n_groups = len(uniques)
+    return ids, n_groups
+
+
+def duplicate_masks(
+    df: pd.DataFrame, uidCol: Optional[Union[str, List[str]]], keptRow: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the kept and the duplicated rows with a single pass over the keys.
+
+    The rows are numbered by key once; the size and the first and last position
+    of every group then give both masks, where DataFrame.duplicated would hash
+    the keys once per mask.
+
+    Args:
+    df (pd.DataFrame): Input dataframe
+    uidCol (Optional[Union[str, List[str]]]): Column(s) identifying a row, all columns when None
+    keptRow (str): "first", "last" or "none"
+
+    Returns:
+    Tuple[np.ndarray, np.ndarray]: Whether every row is kept, and whether its key
+    occurs more than once
+    """
+    keep = keptRow.lower()
+    if keep not in ("first", "last", "none"):
+        raise ValueError("keptRow must be 'first', 'last' or 'none'")
+    if uidCol is None:
+        columns = list(df.columns)
+    else:
+        columns = [uidCol] if isinstance(uidCol, str) else list(uidCol)
+
+    ids, n_groups = group_ids(df[columns])
+    duplicated = np.bincount(ids, minlength=n_groups)[ids] > 1
+
+    positions = np.arange(len(df))
+    if keep == "first":
+        first = np.full(n_groups, len(df))
+        np.minimum.at(first, ids, positions)
+        kept = first[ids] == positions
+    elif keep == "last":
+        last = np.full(n_groups, -1)
+        np.maximum.at(last, ids, positions)
+        kept = last[ids] == positions
+    else:
+        kept = ~duplicated
+    return kept, duplicated
+
+
+def duplicate_counts(unique_count: int, duplicate_count: int) -> Dict[str, Union[int, float]]:
+    """Return the counts reported by the deduplication endpoints."""
+    total_count = unique_count + duplicate_count
+    return {
+        "unique_count": unique_count,
+        "duplicate_count": duplicate_count,
+        "percent_duplicates": (duplicate_count / total_count) * 100 if total_count > 0 else 0,
+    }
+
+
+def output_dtypes(dtypes: pd.Series) -> Dict[str, str]:
+    """Return the dtypes of a deduplication output, saved with it for read_dedup_output."""
+    return {str(col): str(dtype) for col, dtype in dtypes.items()}
+
+
+def writeExportDuplicates(
+    df: pd.DataFrame,
+    uidCol: Optional[Union[str, List[str]]],
+    keptRow: str,
+    export: bool,
+    output_dir: str,
+) -> Dict[str, Any]:
+    """
+    Drop duplicates from an in-memory dataframe, writing the results like
+    dropExportDuplicatesFromFile does.
+
+    Args:
+    df (pd.DataFrame): Input dataframe
+    uidCol (Optional[Union[str, List[str]]]): Column(s) identifying a row, all columns when None
+    keptRow (str): "first", "last" or "none"
+    export (bool): Whether to write the duplicated rows
+    output_dir (str): Directory the results are written to
+
+    Returns:
+    Dict[str, Any]: unique_count, duplicate_count, percent_duplicates and the
+    column dtypes of the written files
+    """
+    df_unique, df_dupl = split_duplicates(df, uidCol, keptRow, export)
+    df_unique.to_csv(os.path.join(output_dir, DEDUP_UNIQUE_FILE), index=False)
+    if df_dupl is not None:
+        df_dupl.to_csv(os.path.join(output_dir, DEDUP_DUPLICATE_FILE), index=False)
+    return dict(
+        duplicate_counts(len(df_unique), len(df_dupl) if df_dupl is not None else 0),
+        dtypes=output_dtypes(df_unique.dtypes),
+    )
+
+
+def read_dtypes(dtypes: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    """
+    Return the dtype argument of pd.read_csv for a deduplication output.
+
+    Columns of other dtypes than DEDUP_READ_DTYPES are read as str, so that a
+    value like "007" is not parsed as 7 on pages without other strings.
+    """
+    if dtypes is None:
+        return None
+    return {col: dtype if dtype in DEDUP_READ_DTYPES else str for col, dtype in dtypes.items()}
+
+
+def read_dedup_output(
+    path: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Read rows of a file written by process_in_chunks or writeExportDuplicates.
+
+    Args:
+    path (str): Path of the file, which is empty when the input had no rows
+    offset (int): Number of rows skipped
+    limit (Optional[int]): Maximum number of rows read, all remaining rows when None
+    dtypes (Optional[Dict[str, str]]): Column dtypes saved when the file was
+        written, inferred from the rows read when None
+
+    Returns:
+    pd.DataFrame: The rows
+    """
+    if os.path.getsize(path) == 0:
+        return pd.DataFrame()
+    return pd.read_csv(
+        path,
+        skiprows=range(1, offset + 1),
+        nrows=limit,
+        dtype=read_dtypes(dtypes),
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+def iter_dedup_output(
+    path: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+    batch_rows: int = DEDUP_BATCH_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """Like read_dedup_output, but yields the rows in batches of at most batch_rows."""
+    if os.path.getsize(path) == 0 or limit == 0:
+        return
+    yield from pd.read_csv(
+        path,
+        skiprows=range(1, offset + 1),
+        nrows=limit,
+        chunksize=batch_rows,
+        dtype=read_dtypes(dtypes),
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+def finite_chunks(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield the chunks with infinite values replaced by NaN, as split_duplicates does."""
+    for chunk in chunks:
+        yield chunk.replace([np.inf, -np.inf], np.nan)
+
+
 def process_in_chunks(
+    source: Callable[[], Iterable[pd.DataFrame]],
+    uidCol: Union[str, List[str]],
+    keptRow: str,
+    export: bool,
+    unique_path: str,
+    duplicate_path: Optional[str] = None,
+    n_rows: Optional[int] = None,
+    progress: Optional[Callable[[float], None]] = None,
+) -> Tuple[int, Optional[int]]:
+    """
+    Drop duplicates from a file larger than memory, writing the results to CSV files.
+
+    The rows are streamed twice. The first pass adds the hash of every key to a
+    HashedKeyIndex, which spills to disk when it grows large, so duplicates are
+    found across chunks; the second pass writes each chunk's kept rows to
+    unique_path and, when exporting, every row whose key occurs more than once
+    to duplicate_path. Peak memory is bounded by the chunk size and the index's
+    memory budget.
+
+    Args:
+    source (Callable[[], Iterable[pd.DataFrame]]): Returns the chunks from the
+        start, called once per pass. Every chunk must parse a column with the
+        same dtype, e.g. chunks of a Parquet file, or equal keys could differ.
+    uidCol (Union[str, List[str]]): Column(s) identifying a row
+    keptRow (str): "first", "last" or "none" (drop every duplicated key)
+    export (bool): Whether to write the duplicated rows
+    unique_path (str): Output CSV of the kept rows
+    duplicate_path (Optional[str]): Output CSV of the duplicated rows, required when exporting
+    n_rows (Optional[int]): Number of rows in the source, if known, for progress reporting
+    progress (Optional[Callable[[float], None]]): Called with the completed fraction
+
+    Returns:
+    Tuple[int, Optional[int]]: Number of unique and duplicated rows written
+    """
+    if export and duplicate_path is None:
+        raise ValueError("duplicate_path is required when exporting duplicates")
+
+    keep_param = False if keptRow.lower() == "none" else keptRow.lower()
+
+    def report(fraction):
+        if progress:
+            progress(min(fraction, 1.0))
+
+    with HashedKeyIndex() as index:
+        for chunk in finite_chunks(source()):
+            index.add(hash_keys(chunk, uidCol))
+            if n_rows:
+                report(0.5 * index.n_rows / n_rows)
+        status = index.resolve(keep_param)
+        report(0.5)
+
+        unique_count, duplicate_count, offset = 0, 0, 0
+        with ExitStack() as stack:
+            unique_file = stack.enter_context(open(unique_path, "w", newline=""))
+            duplicate_file = (
+                stack.enter_context(open(duplicate_path, "w", newline="")) if export else None
+            )
+            for chunk in finite_chunks(source()):
+                rows = status[offset : offset + len(chunk)]
+                header = offset == 0
+                kept = chunk[(rows & ROW_KEPT) > 0]
+                kept.to_csv(unique_file, header=header, index=False)
+                unique_count += len(kept)
+                if export:
+                    duplicated = chunk[(rows & ROW_DUPLICATED) > 0]
+                    duplicated.to_csv(duplicate_file, header=header, index=False)
+                    duplicate_count += len(duplicated)
+                offset += len(chunk)
+                report(0.5 + 0.5 * offset / max(index.n_rows, 1))
+
+    return unique_count, duplicate_count if export else None
+
+
+def dropExportDuplicatesFromFile(
     file_path: str,
+    storage_format: str,
     uidCol: Union[str, List[str]],
     keptRow: str,
     export: bool,
     chunksize: int,
-) -> Tuple[List[Dict], Optional[List[Dict]]]:
-    unique_rows = []
-    duplicate_rows = []
+    output_dir: str,
+    progress: Optional[Callable[[float], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Drop duplicates from a stored file on disk with bounded memory.
 
-    keep_param = False if keptRow.lower() == "none" else keptRow.lower()
+    The kept rows are written to unique.csv in output_dir and, when exporting,
+    the duplicated rows to duplicate.csv.
 
-    def safe_convert(df):
-        return df.replace({np.nan: None, np.inf: None, -np.inf: None}).to_dict(
-            "records"
-        )
+    Args:
+    file_path (str): Path of the file
+    storage_format (str): Either "csv" or "parquet"
+    uidCol (Union[str, List[str]]): Column(s) identifying a row
+    keptRow (str): "first", "last" or "none"
+    export (bool): Whether to write the duplicated rows
+    chunksize (int): Number of rows processed at a time
+    output_dir (str): Directory the results are written to
+    progress (Optional[Callable[[float], None]]): Called with the completed fraction
 
-    for chunk in pd.read_csv(
-        file_path, chunksize=chunksize, keep_default_na=False, na_values=[""]
-    ):
-        chunk = chunk.replace([np.inf, -np.inf], np.nan)
-        is_duplicate = chunk.duplicated(subset=uidCol, keep=False)
-        unique_rows.extend(
-            safe_convert(chunk[~chunk.duplicated(subset=uidCol, keep=keep_param)])
+    Returns:
+    Dict[str, Any]: unique_count, duplicate_count, percent_duplicates and the
+    column dtypes of the written files
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(file_path) or None) as tmpdir:
+        if storage_format != STORAGE_FORMAT_PARQUET:
+            # Parse every chunk with the dtypes of the whole file, as the
+            # in-memory path does
+            file_path = csv_file_to_parquet(file_path, tmpdir, chunksize)
+
+        def source():
+            return stored_file_chunks(file_path, STORAGE_FORMAT_PARQUET, chunksize)
+
+        unique_count, duplicate_count = process_in_chunks(
+            source,
+            uidCol,
+            keptRow,
+            export,
+            os.path.join(output_dir, DEDUP_UNIQUE_FILE),
+            os.path.join(output_dir, DEDUP_DUPLICATE_FILE) if export else None,
+            n_rows=stored_file_rows(file_path, STORAGE_FORMAT_PARQUET),
+            progress=progress,
         )
-        if export:
-            duplicate_rows.extend(safe_convert(chunk[is_duplicate]))
-
-    return unique_rows, duplicate_rows if export else None
+        dtypes = stored_file_dtypes(file_path, STORAGE_FORMAT_PARQUET)
+    return dict(duplicate_counts(unique_count, duplicate_count or 0), dtypes=dtypes)
 
 
 def missingEntries(df: pd.DataFrame, colName: str) -> Tuple[int, Optional[float], int]:
@@ -0,0 +1,96 @@
+import io
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pyarrow as pa
+
+FORMAT_JSON = "json"
+FORMAT_NPZ = "npz"
+FORMAT_ARROW = "arrow"
+
+MEDIA_TYPES = {
+    FORMAT_JSON: "application/json",
+    FORMAT_NPZ: "application/x-npz",
+    FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+}
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Pick the response encoding from an explicit format or the Accept header.
+
+    Args:
+    requested (Optional[str]): Format named in the request, which takes precedence.
+    accept (Optional[str]): Value of the Accept header.
+
+    Returns:
+    str: One of FORMAT_JSON, FORMAT_NPZ or FORMAT_ARROW.
+
+    Raises:
+    ValueError: If the requested format is not supported.
+    """
+    if requested:
+        if requested not in MEDIA_TYPES:
+            raise ValueError(f"format must be one of {', '.join(MEDIA_TYPES)}")
+        return requested
+    formats = {media_type: fmt for fmt, media_type in MEDIA_TYPES.items()}
+    for media_type in (accept or "").split(","):
+        fmt = formats.get(media_type.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    return FORMAT_JSON
+
+
+def encode_npz(arrays: Dict[str, Any]) -> bytes:
+    """
+    Encode arrays as an uncompressed .npz archive, readable with numpy.load.
+
+    Args:
+    arrays (Dict[str, Any]): Arrays (or scalars) by name.
+
+    Returns:
+    bytes: The archive.
+    """
+    buffer = io.BytesIO()
+    np.savez(buffer, **{name: np.asarray(values) for name, values in arrays.items()})
+    return buffer.getvalue()
+
+
+def encode_arrow(arrays: Dict[str, Any]) -> bytes:
+    """
+    Encode arrays as an Arrow IPC stream holding a single-row table.
+
+    Every array becomes a list column with its values flattened in C order; the
+    original shape is stored as JSON in the "shape" metadata of the field, so
+    arrays can be restored with np.reshape.
+
+    Args:
+    arrays (Dict[str, Any]): Arrays (or scalars) by name.
+
+    Returns:
+    bytes: The IPC stream.
+    """
+    fields, columns = [], []
+    for name, values in arrays.items():
+        values = np.asarray(values)
+        flat = pa.array(values.ravel())
+        columns.append(pa.ListArray.from_arrays(pa.array([0, len(flat)], pa.int32()), flat))
+        fields.append(
+            pa.field(name, columns[-1].type, metadata={"shape": json.dumps(values.shape)})
+        )
+    table = pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_arrays(arrays: Dict[str, Any], fmt: str) -> bytes:
+    """Encode arrays in one of the binary formats."""
+    if fmt == FORMAT_NPZ:
+        return encode_npz(arrays)
+    if fmt == FORMAT_ARROW:
+        return encode_arrow(arrays)
+    raise ValueError(f"Unsupported binary format '{fmt}'")
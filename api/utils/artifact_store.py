@@ -0,0 +1,172 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+META_FILE = "meta.json"
+
+# Staging directories older than this are left over from crashed builds
+STALE_STAGING_SECONDS = 24 * 3600
+
+
+class ArtifactStore:
+    """
+    Directory of computed files shared by every API process on the host.
+
+    Each artifact is a directory named by its id, holding the files written by
+    the function that built it and a meta.json file with that function's
+    result. Artifacts are built in a staging directory and renamed into place,
+    so readers never see a partial artifact and concurrent builds of the same id
+    are harmless. Entries expire ttl_seconds after they were built, and the
+    least recently used ones are evicted when the store exceeds max_bytes.
+
+    The store holds no open resources, so it can be passed to job workers.
+    """
+
+    def __init__(self, root: str, ttl_seconds: float, max_bytes: int):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    def staging_dir(self) -> str:
+        """Create a scratch directory inside the store, cleaned up by evict() if left behind."""
+        staging = os.path.join(self.root, ".staging")
+        os.makedirs(staging, exist_ok=True)
+        return tempfile.mkdtemp(dir=staging)
+
+    def path(self, artifact_id: str, name: str = "") -> str:
+        if not artifact_id.isalnum():
+            raise ValueError("Invalid artifact id")
+        return os.path.join(self.root, artifact_id, name)
+
+    def get(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the metadata of an artifact, or None if it is missing or expired.
+
+        Reading an artifact marks it as recently used.
+        """
+        meta_path = self.path(artifact_id, META_FILE)
+        try:
+            built_at = os.stat(self.path(artifact_id)).st_mtime
+            if time.time() - built_at > self.ttl_seconds:
+                return None
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta
+
+    def file(self, artifact_id: str, name: str) -> Optional[str]:
+        """Return the path of a file of an artifact, or None if it does not exist."""
+        if self.get(artifact_id) is None:
+            return None
+        path = self.path(artifact_id, name)
+        return path if os.path.exists(path) else None
+
+    def build(
+        self,
+        artifact_id: str,
+        func: Callable[..., Dict[str, Any]],
+        *args,
+        progress: Optional[Callable[[float], None]] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Return the metadata of an artifact, building it first if needed.
+
+        func(*args, output_dir=..., **kwargs) writes the artifact's files into
+        output_dir and returns a JSON-serialisable dict, stored as the metadata
+        together with the artifact id.
+
+        Args:
+        artifact_id (str): Id of the artifact, usually a hash of its inputs
+        func (Callable[..., Dict[str, Any]]): Builds the artifact
+        progress (Optional[Callable[[float], None]]): Passed on to func when given
+
+        Returns:
+        Dict[str, Any]: The artifact metadata
+        """
+        meta = self.get(artifact_id)
+        if meta is not None:
+            return meta
+
+        staging = self.staging_dir()
+        try:
+            if progress is not None:
+                kwargs = dict(kwargs, progress=progress)
+            meta = dict(func(*args, output_dir=staging, **kwargs), artifact_id=artifact_id)
+            with open(os.path.join(staging, META_FILE), "w") as f:
+                json.dump(meta, f)
+
+            target = self.path(artifact_id)
+            if os.path.exists(target):
+                existing = self.get(artifact_id)
+                if existing is not None:
+                    # Built concurrently by another request, whose files may
+                    # already be being read; keep them
+                    return existing
+                shutil.rmtree(target, ignore_errors=True)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Another build won the race; its result is equivalent
+                pass
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.evict(keep=artifact_id)
+        return meta
+
+    def _entries(self):
+        """Yield (artifact_id, last_used, built_at, size_bytes) of every artifact."""
+        if not os.path.isdir(self.root):
+            return
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or not entry.name.isalnum():
+                continue
+            try:
+                last_used = os.stat(os.path.join(entry.path, META_FILE)).st_mtime
+                size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                yield entry.name, last_used, entry.stat().st_mtime, size
+            except FileNotFoundError:
+                continue
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Delete expired artifacts and the least recently used ones beyond max_bytes.
+
+        Args:
+        keep (Optional[str]): Artifact never evicted for size, e.g. the one just built
+
+        Returns:
+        int: Number of deleted artifacts.
+        """
+        now = time.time()
+        entries = sorted(self._entries(), key=lambda entry: entry[1])
+        total_bytes = sum(entry[3] for entry in entries)
+        deleted = 0
+        for artifact_id, _, built_at, size in entries:
+            expired = now - built_at > self.ttl_seconds
+            if expired or (total_bytes > self.max_bytes and artifact_id != keep):
+                shutil.rmtree(self.path(artifact_id), ignore_errors=True)
+                total_bytes -= size
+                deleted += 1
+
+        staging = os.path.join(self.root, ".staging")
+        if os.path.isdir(staging):
+            for entry in os.scandir(staging):
+                if now - entry.stat().st_mtime > STALE_STAGING_SECONDS:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        return deleted
+
+    def stats(self) -> dict:
+        entries = list(self._entries())
+        return {
+            "entries": len(entries),
+            "bytes": sum(entry[3] for entry in entries),
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
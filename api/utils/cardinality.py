@@ -0,0 +1,57 @@
+import numpy as np
+
+# 2**14 registers of one byte: a standard error of about 1.04 / 2**7, i.e. 0.8%
+HLL_PRECISION = 14
+
+# Linear counting is used up to this many distinct values per register, where
+# the raw HyperLogLog estimate is still biased upwards by more than 1%
+LINEAR_COUNTING_MAX_LOAD = 3
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch of the number of distinct 64-bit hashes added to it.
+
+    The top precision bits of a hash select a register, which keeps the largest
+    rank (position of the first set bit) seen among the remaining bits. Memory is
+    2**precision bytes whatever the number of values, and adding the same hash
+    twice has no effect, so sketches can be fed overlapping batches. Small
+    cardinalities are estimated by linear counting of the empty registers, as
+    the raw estimate is biased for them.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = np.zeros(2**precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Add uint64 hashes, e.g. from pandas.util.hash_pandas_object."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if len(hashes) == 0:
+            return
+        n_bits = 64 - self.precision
+        index = (hashes >> np.uint64(n_bits)).astype(np.intp)
+        # The remaining bits fit in a float64 mantissa, so frexp gives their exact
+        # bit length (0 for 0)
+        rest = (hashes & np.uint64(2**n_bits - 1)).astype(np.float64)
+        rank = (n_bits + 1 - np.frexp(rest)[1]).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Add every hash added to other, which must have the same precision."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        """Return the estimated number of distinct hashes added."""
+        m = len(self.registers)
+        n_empty = int(np.count_nonzero(self.registers == 0))
+        if n_empty > 0:
+            linear = m * np.log(m / n_empty)
+            if linear <= LINEAR_COUNTING_MAX_LOAD * m:
+                return float(linear)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        return float(alpha * m * m / np.ldexp(1.0, -self.registers.astype(np.int64)).sum())
@@ -0,0 +1,100 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Tuple
+
+import pandas as pd
+
+
+class DataFrameCache:
+    """
+    Process-wide LRU cache of parsed DataFrames, bounded by their in-memory size.
+
+    Entries are keyed by the stored file id (None for ad-hoc uploads), a hash of the
+    raw file content and the options used to read it, so the same bytes are only
+    parsed once per set of read options.
+
+    Cached frames are handed out as shallow copies, which share their data with
+    the cache instead of duplicating it per request. Callers may add or replace
+    whole columns (df[col] = ...), which only changes their copy, but must copy
+    the frame before writing values in place (.loc/.iloc assignment, inplace=True).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_id: Optional[int], content_hash: str, read_options: dict) -> Tuple:
+        """
+        Build a cache key for the given file contents and read options.
+
+        Args:
+        file_id (Optional[int]): Id of the stored file, or None for direct uploads.
+        content_hash (str): Hash of the raw file contents.
+        read_options (dict): Keyword arguments passed to the reader.
+
+        Returns:
+        Tuple: A hashable cache key.
+        """
+        options = json.dumps(read_options, sort_keys=True, default=str)
+        return (file_id, content_hash, options)
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy(deep=False)
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (df.copy(deep=False), size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return the cached DataFrame for key, parsing it with loader on a miss.
+
+        Args:
+        key (Hashable): Cache key, usually built with make_key.
+        loader (Callable[[], pd.DataFrame]): Function that parses the file.
+
+        Returns:
+        pd.DataFrame: A shallow copy of the cached DataFrame.
+        """
+        df = self.get(key)
+        if df is None:
+            df = loader()
+            self.put(key, df)
+        return df
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,240 @@
+import hashlib
+import io
+import json
+import os
+from typing import IO, Callable, ContextManager, Dict, Iterator, List, Optional, TextIO, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORAGE_FORMAT_CSV = "csv"
+STORAGE_FORMAT_PARQUET = "parquet"
+
+PARQUET_COMPRESSION = "zstd"
+
+# Rows parsed per batch when converting uploads
+INGEST_CHUNK_ROWS = 50_000
+
+ARROW_TYPES = {
+    "int64": pa.int64(),
+    "uint64": pa.uint64(),
+    "float64": pa.float64(),
+    "bool": pa.bool_(),
+    "object": pa.string(),
+}
+
+
+def content_hash(contents: bytes) -> str:
+    """Return a short, stable hash of stored file contents."""
+    return hashlib.blake2b(contents, digest_size=16).hexdigest()
+
+
+def normalise_object_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Make object columns storable in a columnar format.
+
+    pandas can produce object columns holding a mix of numbers and strings, which
+    Arrow cannot store in a single typed column. Such columns are converted to
+    strings, leaving missing values untouched.
+
+    Args:
+    df (pd.DataFrame): Input dataframe
+
+    Returns:
+    pd.DataFrame: Dataframe whose object columns hold a single type
+    """
+    for col in df.columns[df.dtypes == object]:
+        inferred = pd.api.types.infer_dtype(df[col], skipna=True)
+        if inferred not in ("string", "empty", "bytes"):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def schema_json(dtypes: Dict[str, str]) -> str:
+    """Return a column name -> dtype mapping as the stored JSON schema."""
+    return json.dumps([{"name": str(col), "dtype": dtype} for col, dtype in dtypes.items()])
+
+
+def merge_dtypes(current: Optional[str], new: str) -> str:
+    """
+    Combine the dtypes pandas inferred for the same column in two chunks.
+
+    Mirrors what pandas infers when parsing the whole file at once: integers
+    widen to floats when missing values appear, anything else that disagrees
+    falls back to strings.
+    """
+    if current is None or current == new:
+        return new
+    if {current, new} <= {"int64", "float64"}:
+        return "float64"
+    return "object"
+
+
+def csv_to_parquet(
+    open_text: Callable[[], ContextManager[TextIO]],
+    output: IO[bytes],
+    delimiter: str = ",",
+    chunksize: int = INGEST_CHUNK_ROWS,
+    on_chunk: Optional[Callable[[pd.DataFrame], None]] = None,
+) -> Tuple[Dict[str, str], int]:
+    """
+    Convert CSV text into Parquet, one batch of rows at a time.
+
+    The CSV is read twice: a first pass infers a dtype per column that holds for
+    every chunk, the second writes the chunks with that schema. Peak memory is
+    bounded by the chunk size rather than the file size.
+
+    Args:
+    open_text (Callable[[], ContextManager[TextIO]]): Opens the CSV text from the
+        start; called once per pass
+    output (IO[bytes]): Binary file the Parquet data is written to
+    delimiter (str): Field delimiter
+    chunksize (int): Number of rows parsed per batch
+    on_chunk (Optional[Callable[[pd.DataFrame], None]]): Called with every chunk
+        as it is written, parsed with the final dtypes
+
+    Returns:
+    Tuple[Dict[str, str], int]: Column dtypes and number of rows written
+    """
+    dtypes: Dict[str, str] = {}
+    with open_text() as text:
+        for chunk in pd.read_csv(text, sep=delimiter, chunksize=chunksize):
+            for col, dtype in chunk.dtypes.items():
+                dtypes[col] = merge_dtypes(dtypes.get(col), str(dtype))
+
+    # Columns of any other dtype are stored as strings, so parse them as such
+    dtypes = {col: (dtype if dtype in ARROW_TYPES else "object") for col, dtype in dtypes.items()}
+    read_dtypes = {col: (str if dtype == "object" else dtype) for col, dtype in dtypes.items()}
+    schema = pa.schema([(col, ARROW_TYPES[dtype]) for col, dtype in dtypes.items()])
+
+    n_rows = 0
+    with pq.ParquetWriter(output, schema, compression=PARQUET_COMPRESSION) as writer:
+        with open_text() as text:
+            for chunk in pd.read_csv(
+                text, sep=delimiter, chunksize=chunksize, dtype=read_dtypes
+            ):
+                writer.write_table(
+                    pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                )
+                if on_chunk:
+                    on_chunk(chunk)
+                n_rows += len(chunk)
+
+    return dtypes, n_rows
+
+
+def csv_file_to_parquet(file_path: str, directory: str, chunksize: int = INGEST_CHUNK_ROWS) -> str:
+    """
+    Convert a UTF-8 CSV file on disk into a Parquet file in directory.
+
+    Chunks read from the result share one dtype per column, inferred from the
+    whole file as pd.read_csv would, unlike chunks parsed from the CSV directly.
+
+    Args:
+    file_path (str): Path of the CSV file
+    directory (str): Directory the Parquet file is written to
+    chunksize (int): Number of rows parsed per batch
+
+    Returns:
+    str: Path of the Parquet file
+    """
+    path = os.path.join(directory, os.path.splitext(os.path.basename(file_path))[0] + ".parquet")
+    with open(path, "wb") as output:
+        csv_to_parquet(
+            lambda: open(file_path, encoding="utf-8", newline=""), output, chunksize=chunksize
+        )
+    return path
+
+
+def dataframe_to_parquet(df: pd.DataFrame) -> bytes:
+    """
+    Serialise a dataframe into compressed Parquet bytes.
+
+    Args:
+    df (pd.DataFrame): Input dataframe
+
+    Returns:
+    bytes: Parquet file contents
+    """
+    buffer = io.BytesIO()
+    normalise_object_columns(df).to_parquet(
+        buffer, index=False, compression=PARQUET_COMPRESSION
+    )
+    return buffer.getvalue()
+
+
+def stored_columns(contents: bytes, storage_format: str) -> Optional[List[str]]:
+    """Return the column names of a stored file, or None if unknown without parsing."""
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        return pq.ParquetFile(io.BytesIO(contents)).schema_arrow.names
+    return None
+
+
+def read_stored_file(
+    contents: bytes,
+    storage_format: str,
+    columns: Optional[List[str]] = None,
+    **csv_options,
+) -> pd.DataFrame:
+    """
+    Read a stored file into a dataframe.
+
+    Args:
+    contents (bytes): Stored file contents
+    storage_format (str): Either "csv" (legacy uploads) or "parquet"
+    columns (Optional[List[str]]): Columns to load, all columns when None.
+        Only honoured for Parquet files
+    **csv_options: Keyword arguments passed to pd.read_csv for CSV files
+
+    Returns:
+    pd.DataFrame: The stored dataset
+    """
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        return pd.read_parquet(io.BytesIO(contents), columns=columns)
+    return pd.read_csv(io.StringIO(contents.decode("utf-8")), **csv_options)
+
+
+def stored_file_to_csv(contents: bytes, storage_format: str) -> str:
+    """Return the stored file as CSV text."""
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        return read_stored_file(contents, storage_format).to_csv(index=False)
+    return contents.decode("utf-8")
+
+
+def stored_file_chunks(
+    path: str, storage_format: str, chunksize: int, **csv_options
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a stored file from disk in chunks of at most chunksize rows.
+
+    Args:
+    path (str): Path of the stored file
+    storage_format (str): Either "csv" or "parquet"
+    chunksize (int): Number of rows per chunk
+    **csv_options: Keyword arguments passed to pd.read_csv for CSV files
+
+    Returns:
+    Iterator[pd.DataFrame]: The chunks, in file order
+    """
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        parquet_file = pq.ParquetFile(path)
+        return (
+            batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunksize)
+        )
+    return pd.read_csv(path, chunksize=chunksize, **csv_options)
+
+
+def stored_file_dtypes(path: str, storage_format: str) -> Optional[Dict[str, str]]:
+    """Return the pandas dtype of every column of a stored file, or None if unknown without parsing."""
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        dtypes = pq.read_schema(path).empty_table().to_pandas().dtypes
+        return {str(col): str(dtype) for col, dtype in dtypes.items()}
+    return None
+
+
+def stored_file_rows(path: str, storage_format: str) -> Optional[int]:
+    """Return the number of rows of a stored file, or None if unknown without parsing."""
+    if storage_format == STORAGE_FORMAT_PARQUET:
+        return pq.ParquetFile(path).metadata.num_rows
+    return None
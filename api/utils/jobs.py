@@ -0,0 +1,150 @@
+import asyncio
+import inspect
+import multiprocessing
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FINISHED = "finished"
+JOB_FAILED = "failed"
+
+
+class JobFailedError(Exception):
+    """Raised in the API process when a job raised inside its worker."""
+
+
+def _run_job(job_id: str, progress_store, func: Callable, args: tuple, kwargs: dict):
+    """
+    Run func inside a worker process, publishing its progress.
+
+    If func accepts a `progress` keyword argument it receives a callback taking
+    the completed fraction (0 to 1). Updates are throttled to whole percentages
+    because every write is a round trip to the manager process.
+    """
+    last_reported = [-1]
+
+    def progress(fraction: float):
+        percent = int(min(max(fraction, 0.0), 1.0) * 100)
+        if percent != last_reported[0]:
+            last_reported[0] = percent
+            progress_store[job_id] = percent
+
+    if "progress" in inspect.signature(func).parameters:
+        kwargs = dict(kwargs, progress=progress)
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        raise JobFailedError(f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+    progress(1.0)
+    return result
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, future: Future):
+        self.id = job_id
+        self.kind = kind
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+
+
+class JobManager:
+    """
+    Runs long simulations in a pool of worker processes.
+
+    Jobs are tracked in memory by the API process that accepted them; finished
+    jobs are forgotten after result_ttl seconds.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, result_ttl: float = 3600):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._executor is None:
+            # Workers are spawned rather than forked so they never inherit the
+            # API process's threads or database connections
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._progress = self._manager.dict()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context
+            )
+
+    def _prune(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.result_ttl:
+                del self._jobs[job_id]
+                self._progress.pop(job_id, None)
+
+    def submit(self, kind: str, func: Callable, *args, **kwargs) -> str:
+        """
+        Queue func(*args, **kwargs) and return the new job id.
+
+        func and its arguments must be picklable.
+        """
+        with self._lock:
+            self._ensure_started()
+            self._prune()
+            job_id = uuid.uuid4().hex
+            self._progress[job_id] = 0
+            future = self._executor.submit(
+                _run_job, job_id, self._progress, func, args, kwargs
+            )
+            job = Job(job_id, kind, future)
+            future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+            self._jobs[job_id] = job
+            return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job: Job) -> Dict[str, Any]:
+        if job.future.done():
+            status = JOB_FAILED if job.future.exception() else JOB_FINISHED
+        elif job.future.running():
+            status = JOB_RUNNING
+        else:
+            status = JOB_QUEUED
+
+        result = {
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": status,
+            "progress": self._progress.get(job.id, 0) if self._progress is not None else 0,
+            "submitted_at": job.submitted_at,
+            "finished_at": job.finished_at,
+        }
+        if status == JOB_FAILED:
+            result["error"] = str(job.future.exception()).split("\n")[0]
+        return result
+
+    async def wait(self, job: Job, timeout: float):
+        """Wait up to timeout seconds for the job to finish, without raising."""
+        if timeout <= 0 or job.future.done():
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout)
+        except Exception:
+            pass
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._manager.shutdown()
+                self._executor = None
+                self._manager = None
+                self._progress = None
@@ -0,0 +1,191 @@
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Key hashes buffered in memory before the index spills to disk (16 bytes each
+# with the row positions)
+KEY_INDEX_MEMORY_ROWS = 8_000_000
+
+# The hash space is split into 2**PARTITION_BITS partitions once spilled, so that
+# resolving the index only loads one partition at a time
+PARTITION_BITS = 8
+
+# Bits of the per-row status array filled in by HashedKeyIndex.resolve
+ROW_KEPT = 1
+ROW_DUPLICATED = 2
+
+
+def normalise_floats(series: pd.Series) -> pd.Series:
+    """
+    Give equal float values equal bits, so that they hash equal.
+
+    -0.0 becomes 0.0 and every NaN the same NaN, as DataFrame.duplicated and
+    Series.nunique compare them. Other dtypes are returned unchanged.
+    """
+    if not pd.api.types.is_float_dtype(series.dtype):
+        return series
+    series = series + 0.0
+    return series.where(series.notna(), np.nan)
+
+
+def hash_keys(df: pd.DataFrame, columns: Union[str, List[str]]) -> np.ndarray:
+    """
+    Return a 64-bit hash of the key columns of every row.
+
+    Missing values hash equal to each other, and so do 0.0 and -0.0, as in
+    DataFrame.duplicated.
+
+    Args:
+    df (pd.DataFrame): Rows to hash
+    columns (Union[str, List[str]]): Key column(s)
+
+    Returns:
+    np.ndarray: uint64 hash per row
+    """
+    columns = [columns] if isinstance(columns, str) else list(columns)
+    keys = pd.concat([normalise_floats(df[col]) for col in columns], axis=1)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy(np.uint64)
+
+
+class HashedKeyIndex:
+    """
+    Index of the key hashes of a row stream, used to find duplicates in files
+    larger than memory.
+
+    Hashes are added chunk by chunk in file order together with their row
+    position. Up to max_memory_rows of them are kept in memory; beyond that they
+    are appended to per-partition files in a temporary directory. resolve() then
+    processes one partition at a time and returns a status per row, which is
+    itself stored in a memory-mapped file once the index has spilled.
+
+    Two rows are duplicates when their 64-bit key hashes are equal. With n rows
+    the chance of any false match is about n**2 / 2**65, i.e. below one in a
+    million up to a few million rows.
+    """
+
+    def __init__(self, max_memory_rows: int = KEY_INDEX_MEMORY_ROWS, directory: Optional[str] = None):
+        self.max_memory_rows = max_memory_rows
+        self.n_rows = 0
+        self._directory = directory
+        self._tmpdir: Optional[str] = None
+        self._hashes: List[np.ndarray] = []
+        self._buffered = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self._tmpdir is not None
+
+    def add(self, hashes: np.ndarray) -> None:
+        """Add the key hashes of the next rows of the stream."""
+        self._hashes.append(np.asarray(hashes, dtype=np.uint64))
+        self._buffered += len(hashes)
+        self.n_rows += len(hashes)
+        if self._buffered > self.max_memory_rows:
+            self._spill()
+
+    def _partition_path(self, partition: int, suffix: str) -> str:
+        return os.path.join(self._tmpdir, f"{partition:03d}.{suffix}")
+
+    def _spill(self) -> None:
+        if not self._hashes:
+            return
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="key-index-", dir=self._directory)
+
+        hashes = np.concatenate(self._hashes)
+        positions = np.arange(self.n_rows - len(hashes), self.n_rows, dtype=np.int64)
+        partitions = (hashes >> np.uint64(64 - PARTITION_BITS)).astype(np.intp)
+        # Stable, so positions stay increasing within each partition
+        order = np.argsort(partitions, kind="stable")
+        bounds = np.searchsorted(partitions[order], np.arange(2**PARTITION_BITS + 1))
+        for partition in range(2**PARTITION_BITS):
+            rows = order[bounds[partition] : bounds[partition + 1]]
+            if len(rows) == 0:
+                continue
+            with open(self._partition_path(partition, "hash"), "ab") as f:
+                hashes[rows].tofile(f)
+            with open(self._partition_path(partition, "pos"), "ab") as f:
+                positions[rows].tofile(f)
+
+        self._hashes = []
+        self._buffered = 0
+
+    def _partitions(self):
+        """Yield (hashes, positions) of each partition, positions increasing."""
+        if not self.spilled:
+            hashes = np.concatenate(self._hashes) if self._hashes else np.empty(0, np.uint64)
+            yield hashes, np.arange(len(hashes), dtype=np.int64)
+            return
+        for partition in range(2**PARTITION_BITS):
+            path = self._partition_path(partition, "hash")
+            if os.path.exists(path):
+                yield (
+                    np.fromfile(path, dtype=np.uint64),
+                    np.fromfile(self._partition_path(partition, "pos"), dtype=np.int64),
+                )
+
+    def resolve(self, keep: Union[str, bool] = "first") -> np.ndarray:
+        """
+        Decide which rows to keep.
+
+        Args:
+        keep (Union[str, bool]): "first" or "last" keeps one row per key, False
+            keeps only the rows whose key is unique
+
+        Returns:
+        np.ndarray: uint8 status per row position, a combination of ROW_KEPT and
+            ROW_DUPLICATED (the key occurs more than once)
+        """
+        if keep not in ("first", "last", False):
+            raise ValueError("keep must be 'first', 'last' or False")
+        if self.spilled:
+            self._spill()
+
+            status = np.memmap(
+                os.path.join(self._tmpdir, "status"), dtype=np.uint8, mode="w+",
+                shape=(max(self.n_rows, 1),),
+            )[: self.n_rows]
+        else:
+            status = np.zeros(self.n_rows, dtype=np.uint8)
+
+        for hashes, positions in self._partitions():
+            if len(hashes) == 0:
+                continue
+            order = np.argsort(hashes, kind="stable")
+            sorted_hashes = hashes[order]
+            starts = np.flatnonzero(np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]])
+            counts = np.diff(np.r_[starts, len(hashes)])
+            group_counts = np.repeat(counts, counts)
+
+            if keep == "first":
+                kept = np.zeros(len(hashes), dtype=bool)
+                kept[starts] = True
+            elif keep == "last":
+                kept = np.zeros(len(hashes), dtype=bool)
+                kept[starts + counts - 1] = True
+            else:
+                kept = group_counts == 1
+
+            rows = positions[order]
+            status[rows] = np.where(kept, ROW_KEPT, 0) | np.where(
+                group_counts > 1, ROW_DUPLICATED, 0
+            )
+
+        return status
+
+    def close(self) -> None:
+        """Remove the spilled files."""
+        self._hashes = []
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,7 +1,17 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import partial
+from statistics import NormalDist
+
 import numpy as np
-from scipy.stats import binom
 import matplotlib
 import pandas as pd
+from scipy.special import ndtr
+from scipy.stats import kendalltau, rankdata
 
 matplotlib.use('Agg')
 
@@ -10,6 +20,75 @@ import base64
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from io import BytesIO
 
+# Upper bound on the subordinate measurements simulated in one NumPy call
+MAX_DRAWS_PER_BATCH = 2_000_000
+
+# Simulations are split into at least this many independently seeded batches so
+# they can be spread over worker processes. It is fixed, rather than derived from
+# the number of workers, so seeded results do not depend on it.
+MIN_SIMULATION_BATCHES = 16
+
+# Size of the process pool shared by every simulation of the API process; the
+# workers parameter of a request only limits how much of it that request uses
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", "0")) or os.cpu_count() or 1
+
+# Figures of the third-party sampling strategy that can be rendered on demand
+THIRD_PARTY_FIGURES = ("ranks", "real_units")
+FIGURE_FORMATS = ("png", "svg")
+
+# Parameters of the L1 calculator that take a list of values in a sweep
+L1_SWEEP_PARAMS = ("confidence", "percent_punish", "percent_guarantee")
+
+# Result modes of the L2 calculator: one random draw, a normal approximation of the
+# measurement noise, or a batch of simulations
+L2_MODES = ("sample", "analytic", "simulate")
+
+# Coverage of the bands returned by the L2 calculator
+L2_BAND_COVERAGE = 0.95
+
+# Quadrature nodes used to average over a block's own measurement noise
+L2_QUADRATURE_NODES = 16
+
+# pyplot keeps global state, so figures are rendered one at a time
+_figure_lock = threading.Lock()
+
+
+def get_seed_sequence(seed=None):
+    """
+    Return the SeedSequence a simulation draws its random streams from.
+
+    Args:
+    seed (int or numpy.random.SeedSequence, optional): Seed of the simulation. None
+        draws fresh entropy from the OS, so results differ between runs.
+
+    Returns:
+    numpy.random.SeedSequence: Root of the simulation's random streams.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def new_seed():
+    """Return a fresh random seed, small enough to round-trip through JSON clients."""
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+
+def get_rng(seed=None):
+    """
+    Return a numpy random Generator.
+
+    Args:
+    seed (int, numpy.random.SeedSequence or numpy.random.Generator, optional):
+        Seed of the generator; a Generator is returned unchanged.
+
+    Returns:
+    numpy.random.Generator: Generator to draw from.
+    """
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
 def error_handling(params):
     """
     Perform basic error checks on the input parameters.
@@ -41,9 +120,17 @@ def error_handling(params):
     ):
         return (0, "ERROR: confidence must be between 0 and 1")
 
+    if params.get("early_stopping_alpha") is not None and (
+        params["early_stopping_alpha"] <= 0 or params["early_stopping_alpha"] >= 1
+    ):
+        return (0, "ERROR: early_stopping_alpha must be between 0 and 1")
+
     if "distribution" in params and params["distribution"] not in ["uniform", "normal"]:
         return (0, "ERROR: distribution must be 'uniform' or 'normal'")
 
+    if "mode" in params and params["mode"] not in L2_MODES:
+        return (0, f"ERROR: mode must be one of {', '.join(L2_MODES)}")
+
     if "n_blocks_reward" in params : 
         n_sub_per_block, n_blocks = number_of_subs(
         params["level_test"],
@@ -84,10 +171,12 @@ def number_of_subs(level_test, n_subs_per_block, n_blocks_per_district, n_distri
         print('\'level test\' should be either \'Block\' or \'District\' or \'State\'')
         return None, None
 
-def get_real_ts(n_blocks, average_truth_score, sd_across_blocks, n_sub_per_block, sd_within_block):
-    block_mean_ts = generate_true_disc(n_blocks, 0, 1, average_truth_score, sd_across_blocks, 'normal')
+def get_real_ts(n_blocks, average_truth_score, sd_across_blocks, n_sub_per_block, sd_within_block, rng=None):
+    rng = get_rng(rng)
+    block_mean_ts = generate_true_disc(n_blocks, 0, 1, average_truth_score, sd_across_blocks, 'normal', rng)
     real_order = list(np.argsort(block_mean_ts))
-    real_ts = [generate_true_disc(n_sub_per_block, 0, 1, block_mean_ts[block], sd_within_block, 'normal') for block in range(n_blocks)]
+    # One row of subordinate truth scores per block
+    real_ts = np.clip(rng.normal(block_mean_ts[:, None], sd_within_block, (n_blocks, n_sub_per_block)), 0, 1)
     return real_order, real_ts
 
 def get_list_n_sub(n_sub_per_block, min_sub_per_block):
@@ -96,32 +185,283 @@ def get_list_n_sub(n_sub_per_block, min_sub_per_block):
 def get_list_n_samples(total_samples, n_blocks, list_n_sub):
     return [int(total_samples/(n_blocks*n_sub)) for n_sub in list_n_sub]
 
-def get_meas_ts(n_blocks, n_sub_per_block, n_sub_test, n_samples, real_ts):
-    meas_ts = np.zeros(n_blocks)
-    for block in range(n_blocks):
-        subs_test = np.random.choice(list(range(n_sub_per_block)), size=n_sub_test)
-        meas_ts[block] = np.mean([binom.rvs(n_samples, real_ts[block][sub])/n_samples for sub in subs_test])
-    return meas_ts
+_simulation_pool = None
+_simulation_pool_lock = threading.Lock()
+
+
+def get_simulation_pool():
+    """Return the shared simulation process pool, starting it on first use."""
+    global _simulation_pool
+    with _simulation_pool_lock:
+        # A pool whose worker died cannot run tasks any more
+        if _simulation_pool is None or getattr(_simulation_pool, "_broken", False):
+            # Workers are spawned rather than forked since the API process runs threads
+            _simulation_pool = ProcessPoolExecutor(
+                max_workers=SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _simulation_pool
+
+
+def shutdown_simulation_pool():
+    global _simulation_pool
+    with _simulation_pool_lock:
+        if _simulation_pool is not None:
+            _simulation_pool.shutdown(wait=False, cancel_futures=True)
+            _simulation_pool = None
+
+
+class LimitedExecutor:
+    """
+    Submits tasks to a shared pool with at most `limit` of them running at once.
+
+    Tasks beyond the limit wait in a queue and are sent to the pool as earlier
+    ones finish, so one request cannot take over the whole pool. Queued tasks can
+    be cancelled through their future.
+    """
+
+    def __init__(self, pool, limit):
+        self._pool = pool
+        self._limit = limit
+        self._running = 0
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args):
+        future = Future()
+        with self._lock:
+            self._queue.append((future, func, args))
+        self._dispatch()
+        return future
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                if self._running >= self._limit or not self._queue:
+                    return
+                future, func, args = self._queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+            try:
+                task = self._pool.submit(func, *args)
+            except Exception as e:
+                with self._lock:
+                    self._running -= 1
+                future.set_exception(e)
+                continue
+            task.add_done_callback(partial(self._finished, future))
+
+    def _finished(self, future, task):
+        with self._lock:
+            self._running -= 1
+        if task.cancelled():
+            future.set_exception(CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+        self._dispatch()
+
+    def cancel_queued(self):
+        """Cancel the tasks that were not sent to the pool yet."""
+        with self._lock:
+            queued, self._queue = list(self._queue), deque()
+        for future, _, _ in queued:
+            future.cancel()
+
+
+@contextmanager
+def get_executor(workers=1):
+    """
+    Yield an executor running up to `workers` tasks at once on the shared simulation
+    pool, or None to run in the calling process.
+
+    Args:
+    workers (int): Requested number of tasks running at once, capped by SIMULATION_WORKERS.
+
+    Yields:
+    LimitedExecutor or None: The executor to pass to run_tasks.
+    """
+    workers = min(int(workers or 1), SIMULATION_WORKERS)
+    if workers <= 1:
+        yield None
+        return
+    executor = LimitedExecutor(get_simulation_pool(), workers)
+    try:
+        yield executor
+    finally:
+        # Tasks of a request that failed or stopped early do not hold up others
+        executor.cancel_queued()
+
+
+def run_tasks(executor, func, tasks, progress=None):
+    """
+    Call func(*task) for every task and return the results in task order.
+
+    Args:
+    executor (LimitedExecutor or None): Executor from get_executor; tasks run one after
+        the other in the calling process when None.
+    func (callable): Module-level function, so it can be sent to worker processes.
+    tasks (list): Argument tuples.
+    progress (callable, optional): Called with the fraction of completed tasks.
+
+    Returns:
+    list: Results of func, in the order of tasks.
+    """
+    if executor is None:
+        results = []
+        for task in tasks:
+            results.append(func(*task))
+            if progress:
+                progress(len(results) / len(tasks))
+        return results
+
+    futures = [executor.submit(func, *task) for task in tasks]
+    if progress:
+        for n_done, _ in enumerate(as_completed(futures), 1):
+            progress(n_done / len(tasks))
+    return [future.result() for future in futures]
+
+
+def iter_tasks(executor, func, tasks):
+    """
+    Yield func(*task) for every task, in task order.
+
+    Unlike run_tasks, the caller can stop consuming results early: tasks that have
+    not started yet are then cancelled.
+
+    Args:
+    executor (LimitedExecutor or None): Executor from get_executor; tasks run one after
+        the other in the calling process when None.
+    func (callable): Module-level function, so it can be sent to worker processes.
+    tasks (list): Argument tuples.
+
+    Yields:
+    The result of func for every task.
+    """
+    if executor is None:
+        for task in tasks:
+            yield func(*task)
+        return
+
+    futures = [executor.submit(func, *task) for task in tasks]
+    try:
+        for future in futures:
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def get_simulation_batches(n_blocks, n_sub_test, n_simulations, seed_seq):
+    """
+    Split simulations into batches, each drawing from its own stream spawned from seed_seq.
+
+    Batches hold at most MAX_DRAWS_PER_BATCH subordinate measurements and there are
+    at least MIN_SIMULATION_BATCHES of them when there are enough simulations.
+
+    Args:
+    n_blocks (int): Number of blocks measured per simulation.
+    n_sub_test (int): Number of subordinates measured per block.
+    n_simulations (int): Number of simulations.
+    seed_seq (numpy.random.SeedSequence): Seed of the simulations.
+
+    Returns:
+    list: (start, stop, seed_seq) of every batch.
+    """
+    batch_size = min(
+        int(np.ceil(n_simulations / MIN_SIMULATION_BATCHES)),
+        MAX_DRAWS_PER_BATCH // max(1, n_blocks * n_sub_test),
+    )
+    batch_size = max(1, batch_size)
+    starts = range(0, n_simulations, batch_size)
+    return [
+        (start, min(start + batch_size, n_simulations), batch_seq)
+        for start, batch_seq in zip(starts, seed_seq.spawn(len(starts)))
+    ]
+
+def get_meas_ts(n_blocks, n_sub_per_block, n_sub_test, n_samples, real_ts, n_simulations=1, rng=None):
+    """
+    Simulate the truth score a third party measures in every block.
+
+    For each simulation and block, n_sub_test subordinates are picked with replacement
+    and each one is measured with n_samples binomial draws. All draws of the batch are
+    made with a single NumPy call.
+
+    Args:
+    n_blocks (int): Number of blocks.
+    n_sub_per_block (int): Number of subordinates in each block.
+    n_sub_test (int): Number of subordinates tested per block.
+    n_samples (int): Number of samples per tested subordinate.
+    real_ts (numpy.array): Real truth scores, shape (n_blocks, n_sub_per_block).
+    n_simulations (int): Number of simulations to draw at once.
+    rng (numpy.random.Generator, optional): Random generator to draw from.
+
+    Returns:
+    numpy.array: Measured truth scores, shape (n_blocks, n_simulations).
+    """
+    rng = get_rng(rng)
+    real_ts = np.asarray(real_ts)
+    subs_test = rng.integers(0, n_sub_per_block, size=(n_blocks, n_simulations, n_sub_test))
+    p = real_ts[np.arange(n_blocks)[:, None, None], subs_test]
+    return rng.binomial(n_samples, p).mean(axis=2) / n_samples
+
+
+def get_meas_order_batch(n_blocks, n_sub_per_block, n_sub_test, n_samples, real_ts, n_simulations, seed_seq):
+    """
+    Simulate the measured order of the blocks for a batch of simulations.
+
+    Args:
+    n_blocks (int): Number of blocks.
+    n_sub_per_block (int): Number of subordinates in each block.
+    n_sub_test (int): Number of subordinates tested per block.
+    n_samples (int): Number of samples per tested subordinate.
+    real_ts (numpy.array): Real truth scores, shape (n_blocks, n_sub_per_block).
+    n_simulations (int): Number of simulations in the batch.
+    seed_seq (numpy.random.SeedSequence): Seed of the batch.
+
+    Returns:
+    numpy.array: Block indices sorted by measured truth score, shape (n_blocks, n_simulations).
+    """
+    meas_ts = get_meas_ts(n_blocks, n_sub_per_block, n_sub_test, n_samples, real_ts, n_simulations, get_rng(seed_seq))
+    return np.argsort(meas_ts, axis=0)
+
+def get_rank_lookup(real_order):
+    """
+    Invert real_order so that rank_of[block] is the real rank of block (0 = lowest).
+    """
+    rank_of = np.empty(len(real_order), dtype=int)
+    rank_of[np.asarray(real_order, dtype=int)] = np.arange(len(real_order))
+    return rank_of
+
+def get_top_measured(meas_order, n_cond, n_top):
+    """
+    Blocks measured in the top n_top positions, best first, shape (n_cond, n_top, n_simulations).
+    """
+    return np.stack([np.asarray(meas_order[i][::-1][:n_top], dtype=int) for i in range(n_cond)])
+
+def get_errorbars(values, n_simulations, errorbar_type):
+    """
+    Error bars of values across simulations, the last axis.
+    """
+    if errorbar_type == 'standard deviation':
+        return np.std(values, axis=-1, ddof=1)
+    elif errorbar_type == 'standard error of the mean':
+        return np.std(values, axis=-1, ddof=1) / np.sqrt(n_simulations)
+    elif errorbar_type == "95% confidence interval":
+        return 1.95 * np.std(values, axis=-1, ddof=1) / np.sqrt(n_simulations)
+    return np.zeros(values.shape[:-1])
 
 def get_ranks(meas_order, real_order, n_blocks, percent_blocks_plot, list_n_sub, n_simulations, errorbar_type):
     n_cond = len(list_n_sub)
     n_blocks_plot = max(1, int(n_blocks*percent_blocks_plot/100))
-    
-    mean_rank = np.zeros([n_blocks_plot, n_cond])
-    errorbars = np.zeros([n_blocks_plot, n_cond])
-    
-    for block in range(n_blocks_plot):
-        for i in range(n_cond):
-            ranks = [real_order.index(meas_order[i][n_blocks - block - 1, sim]) + 1 for sim in range(n_simulations)]
-            mean_rank[block, i] = np.mean(ranks)
-            
-            if errorbar_type == 'standard deviation':
-                errorbars[block, i] = np.std(ranks, ddof=1)
-            elif errorbar_type == 'standard error of the mean':
-                errorbars[block, i] = np.std(ranks, ddof=1) / np.sqrt(n_simulations)
-            elif errorbar_type == f"95% confidence interval":
-                errorbars[block, i] = 1.95 * np.std(ranks, ddof=1) / np.sqrt(n_simulations)
-    
+
+    # Real rank (1 = lowest) of the block measured at each of the top positions
+    ranks = get_rank_lookup(real_order)[get_top_measured(meas_order, n_cond, n_blocks_plot)] + 1
+
+    mean_rank = ranks.mean(axis=-1).T
+    errorbars = get_errorbars(ranks, n_simulations, errorbar_type).T
+
     return mean_rank, errorbars
 
 def get_n_blocks_plot(list_n_sub, n_blocks, percent_blocks_plot):
@@ -130,27 +470,14 @@ def get_n_blocks_plot(list_n_sub, n_blocks, percent_blocks_plot):
     return n_cond, n_blocks_plot
 
 def get_num_real_units(n_cond, n_simulations, n_blocks_reward, real_order, meas_order, n_blocks, errorbar_type):
-    mean_n_real = np.zeros(n_cond)
-    errorbars_n_real = np.zeros(n_cond)
-    
-    for i in range(n_cond):
-        n_real = np.zeros(n_simulations)
-        for sim in range(n_simulations):
-            for block in range(n_blocks_reward):
-                # Get real rank of the block with measured rank = n_blocks - block - 1
-                real_rank = real_order.index(meas_order[i][n_blocks - block - 1, sim])
-                # This block is counted as a 'real' green zone block if its real rank is within the top n_blocks_plot
-                if real_rank >= n_blocks - n_blocks_reward:
-                    n_real[sim] += 1
-        
-        mean_n_real[i] = np.mean(n_real)
-        if errorbar_type == 'standard deviation':
-            errorbars_n_real[i] = np.std(n_real, ddof=1)
-        elif errorbar_type == 'standard error of the mean':
-            errorbars_n_real[i] = np.std(n_real, ddof=1) / np.sqrt(n_simulations)
-        elif errorbar_type == "95% confidence interval":
-            errorbars_n_real[i] = 1.95 * np.std(n_real, ddof=1) / np.sqrt(n_simulations)
-            
+    # Real rank of the blocks measured in the top n_blocks_reward positions
+    real_rank = get_rank_lookup(real_order)[get_top_measured(meas_order, n_cond, n_blocks_reward)]
+    # A block is counted as a 'real' green zone block if its real rank is within the top n_blocks_reward
+    n_real = (real_rank >= n_blocks - n_blocks_reward).sum(axis=1)
+
+    mean_n_real = n_real.mean(axis=-1)
+    errorbars_n_real = get_errorbars(n_real, n_simulations, errorbar_type)
+
     return mean_n_real, errorbars_n_real
 
 def make_plot(mean_rank, errorbars, list_n_sub, list_n_samples, n_blocks, percent_blocks_plot, errorbar_type):
@@ -288,48 +615,202 @@ def make_plot_num_real_units(list_n_sub, list_n_samples, mean_n_real, errorbars_
     return fig
 
 
-def generate_true_disc(n, min_disc, max_disc, mean_disc, std_disc, distribution):
+def generate_true_disc(n, min_disc, max_disc, mean_disc, std_disc, distribution, rng=None):
     """
     Generate true discrepancy values based on the specified distribution.
 
     Args:
-    n (int): Number of values to generate.
+    n (int or tuple): Number (or shape) of values to generate.
     min_disc (float): Minimum discrepancy value.
     max_disc (float): Maximum discrepancy value.
     mean_disc (float): Mean discrepancy value (for normal distribution).
     std_disc (float): Standard deviation of discrepancy (for normal distribution).
     distribution (str): Type of distribution ('uniform' or 'normal').
+    rng (numpy.random.Generator, optional): Random generator to draw from.
 
     Returns:
     numpy.array: Array of generated discrepancy values.
     """
+    rng = get_rng(rng)
     if distribution == "uniform":
-        return np.random.uniform(min_disc, max_disc, n)
+        return rng.uniform(min_disc, max_disc, n)
     elif distribution == "normal":
-        disc = np.random.normal(mean_disc, std_disc, n)
+        disc = rng.normal(mean_disc, std_disc, n)
         return np.clip(disc, min_disc, max_disc)
 
 
-def generate_meas_disc(true_disc, n_samples):
+def generate_meas_disc(true_disc, n_samples, rng=None):
     """
     Generate measured discrepancy values based on true discrepancy.
 
     Args:
-    true_disc (numpy.array): Array of true discrepancy values.
+    true_disc (numpy.array): Array of true discrepancy values, of any shape
+        (e.g. one row per simulation).
     n_samples (int): Number of samples per measurement.
+    rng (numpy.random.Generator, optional): Random generator to draw from.
+
+    Returns:
+    numpy.array: Array of measured discrepancy values, shaped like true_disc.
+    """
+    return get_rng(rng).binomial(n_samples, true_disc) / n_samples
+
+
+def get_top_mask(values, n_top):
+    """
+    Flag the n_top largest values of every row.
+
+    Args:
+    values (numpy.array): 2-D array, one row per simulation.
+    n_top (int): Number of values to flag per row.
 
     Returns:
-    numpy.array: Array of measured discrepancy values.
+    numpy.array: Boolean array shaped like values.
     """
-    return np.array([binom.rvs(n_samples, td) / n_samples for td in true_disc])
+    n_rows, n_cols = values.shape
+    mask = np.zeros(values.shape, dtype=bool)
+    if n_top <= 0:
+        return mask
+    top = np.argpartition(values, n_cols - n_top, axis=1)[:, n_cols - n_top:]
+    mask[np.arange(n_rows)[:, None], top] = True
+    return mask
 
 
-def l1_sample_size_calculator(params):
+def get_l1_meas_seed(meas_root, n_samples, batch):
+    """
+    Return the seed of the measurements of a batch of L1 simulations.
+
+    The seed depends on n_samples rather than on the order in which sample sizes are
+    evaluated, so every search evaluating a sample size sees the same measurements.
+
+    Args:
+    meas_root (numpy.random.SeedSequence): Root of the measurement seeds.
+    n_samples (int): Number of samples per subject.
+    batch (int): Index of the batch of simulations.
+
+    Returns:
+    numpy.random.SeedSequence: Seed of the measurements.
+    """
+    return np.random.SeedSequence(
+        meas_root.entropy, spawn_key=meas_root.spawn_key + (int(n_samples), batch)
+    )
+
+
+def count_l1_caught(n_sub, punish_values, n_samples, n_simulations, disc_params, true_seq, meas_seq):
+    """
+    Count the simulations by number of worst offenders punished, for several n_punish.
+
+    True discrepancies are drawn from true_seq and measurements from meas_seq, so
+    evaluating several n_samples with the same true_seq compares them on the same
+    simulated subjects (common random numbers). All values of punish_values are
+    evaluated on the same draws.
+
+    Args:
+    n_sub (int): Number of subjects.
+    punish_values (list): Numbers of subjects punished, those with the highest
+        measured discrepancy.
+    n_samples (int): Number of samples per subject.
+    n_simulations (int): Number of simulations.
+    disc_params (tuple): min_disc, max_disc, mean_disc, std_disc and distribution
+        passed to generate_true_disc.
+    true_seq (numpy.random.SeedSequence): Seed of the true discrepancies.
+    meas_seq (numpy.random.SeedSequence): Seed of the measurements.
+
+    Returns:
+    numpy.array: Array of shape (len(punish_values), max(punish_values) + 1) whose
+        element [i, k] is the number of simulations in which exactly k of the
+        punish_values[i] worst offenders are punished.
+    """
+    true_disc = generate_true_disc((n_simulations, n_sub), *disc_params, get_rng(true_seq))
+    meas_disc = generate_meas_disc(true_disc, n_samples, get_rng(meas_seq))
+    counts = np.zeros((len(punish_values), max(punish_values) + 1), dtype=np.int64)
+    for i, n_punish in enumerate(punish_values):
+        worst_offenders = get_top_mask(true_disc, n_punish)
+        punished = get_top_mask(meas_disc, n_punish)
+        n_caught = np.count_nonzero(worst_offenders & punished, axis=1)
+        counts[i] = np.bincount(n_caught, minlength=counts.shape[1])
+    return counts
+
+
+def count_l1_successes(n_sub, n_punish, n_guarantee, n_samples, n_simulations, disc_params, true_seq, meas_seq):
+    """
+    Count the simulations in which enough of the worst offenders are punished.
+
+    Args:
+    n_sub (int): Number of subjects.
+    n_punish (int): Number of subjects punished, those with the highest measured discrepancy.
+    n_guarantee (int): Number of worst offenders that must be among the punished.
+    n_samples (int): Number of samples per subject.
+    n_simulations (int): Number of simulations.
+    disc_params (tuple): Passed to generate_true_disc, see count_l1_caught.
+    true_seq (numpy.random.SeedSequence): Seed of the true discrepancies.
+    meas_seq (numpy.random.SeedSequence): Seed of the measurements.
+
+    Returns:
+    int: Number of successful simulations.
+    """
+    counts = count_l1_caught(n_sub, [n_punish], n_samples, n_simulations, disc_params, true_seq, meas_seq)
+    return int(counts[0, n_guarantee:].sum())
+
+
+def wilson_interval(successes, n, alpha):
+    """
+    Wilson score interval of a binomial proportion.
+
+    Args:
+    successes (int): Number of successes.
+    n (int): Number of trials.
+    alpha (float): One minus the coverage of the interval.
+
+    Returns:
+    tuple: Lower and upper bounds of the proportion.
+    """
+    z = NormalDist().inv_cdf(1 - alpha / 2)
+    p = successes / n
+    centre = (p + z**2 / (2 * n)) / (1 + z**2 / n)
+    half_width = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / (1 + z**2 / n)
+    return centre - half_width, centre + half_width
+
+
+def get_l1_decision(successes, n_done, n_simulations, confidence, alpha=None, n_looks=1):
+    """
+    Decide whether a sample size succeeds before all of its simulations are run.
+
+    The decision is exact once the remaining simulations can no longer change it.
+    With alpha, it is also taken as soon as a Wilson interval on the running success
+    rate excludes the confidence threshold; alpha is split evenly across the n_looks
+    times the rate is examined.
+
+    Args:
+    successes (int): Successful simulations so far.
+    n_done (int): Simulations run so far.
+    n_simulations (int): Total number of simulations.
+    confidence (float): Required success rate.
+    alpha (float, optional): Error rate allowed for statistical early stopping.
+    n_looks (int): Number of times the rate is examined.
+
+    Returns:
+    bool or None: Whether the sample size succeeds, None while undecided.
+    """
+    if successes / n_simulations >= confidence:
+        return True
+    if (successes + n_simulations - n_done) / n_simulations < confidence:
+        return False
+    if alpha is not None and 0 < n_done < n_simulations:
+        lower, upper = wilson_interval(successes, n_done, alpha / n_looks)
+        if lower > confidence:
+            return True
+        if upper < confidence:
+            return False
+    return None
+
+
+def l1_sample_size_calculator(params, progress=None):
     """
     Calculate the L1 sample size based on given parameters.
 
     Args:
     params (dict): A dictionary of input parameters.
+    progress (callable, optional): Called with the completed fraction (0 to 1) after each step of the search.
 
     Returns:
     dict: A dictionary containing status, message, and calculated sample size.
@@ -338,37 +819,66 @@ def l1_sample_size_calculator(params):
     if error_status == 0:
         return {"status": 0, "message": error_message}
 
-    n_sub = number_of_subs(
+    n_sub, _ = number_of_subs(
         params["level_test"],
         params["n_subs_per_block"],
         params["n_blocks_per_district"],
         params["n_district"],
     )
+    if n_sub is None:
+        return {"status": 0, "message": "ERROR: \'level test\' should be either \'Block\' or \'District\' or \'State\'"}
     n_punish = int(np.ceil((params["percent_punish"] / 100) * n_sub))
     n_guarantee = int(np.ceil((params["percent_guarantee"] / 100) * n_sub))
+    seed_seq = get_seed_sequence(params.get("seed"))
+    disc_params = (
+        params["min_disc"],
+        params["max_disc"],
+        params["mean_disc"],
+        params["std_disc"],
+        params["distribution"],
+    )
 
-    def simulate(n_samples):
-        true_disc = generate_true_disc(
-            n_sub,
-            params["min_disc"],
-            params["max_disc"],
-            params["mean_disc"],
-            params["std_disc"],
-            params["distribution"],
-        )
-        meas_disc = generate_meas_disc(true_disc, n_samples)
-        worst_offenders = np.argsort(true_disc)[-n_punish:]
-        punished = np.argsort(meas_disc)[-n_punish:]
-        return len(set(worst_offenders) & set(punished)) >= n_guarantee
+    # The true discrepancies of every batch are the same at every step of the search,
+    # only the measurements are drawn again
+    true_root, meas_root = seed_seq.spawn(2)
+    batches = get_simulation_batches(1, n_sub, params["n_simulations"], true_root)
 
     left, right = params["min_n_samples"], params["max_n_samples"]
-    while left < right:
-        mid = (left + right) // 2
-        success_count = sum(simulate(mid) for _ in range(params["n_simulations"]))
-        if success_count / params["n_simulations"] >= params["confidence"]:
-            right = mid
-        else:
-            left = mid + 1
+    n_steps = max(1, int(np.ceil(np.log2(right - left + 1))))
+    step = 0
+    with get_executor(params.get("workers", 1)) as executor:
+        while left < right:
+            mid = (left + right) // 2
+            tasks = [
+                (n_sub, n_punish, n_guarantee, mid, stop - start, disc_params, true_seq, get_l1_meas_seed(meas_root, mid, batch))
+                for batch, (start, stop, true_seq) in enumerate(batches)
+            ]
+
+            # Stop simulating as soon as the outcome of this step is settled
+            successes, n_done, decision = 0, 0, None
+            results = iter_tasks(executor, count_l1_successes, tasks)
+            for (start, stop, _), batch_successes in zip(batches, results):
+                successes += batch_successes
+                n_done += stop - start
+                decision = get_l1_decision(
+                    successes,
+                    n_done,
+                    params["n_simulations"],
+                    params["confidence"],
+                    params.get("early_stopping_alpha"),
+                    len(batches),
+                )
+                if decision is not None:
+                    break
+            results.close()
+
+            if decision:
+                right = mid
+            else:
+                left = mid + 1
+            step += 1
+            if progress:
+                progress(min(step / n_steps, 1.0))
 
     return {
         "status": 1,
@@ -377,10 +887,275 @@ def l1_sample_size_calculator(params):
     }
 
 
+def l1_sample_size_sweep(params, progress=None):
+    """
+    Calculate the L1 sample size for every combination of confidence, percent_punish and percent_guarantee.
+
+    The binary searches of all combinations advance together: each round simulates,
+    in one pass, every sample size that some search needs next. A pass evaluates every
+    number of punished subjects on the same draws and its outcome is kept, so a
+    sample size is simulated at most once whatever the number of combinations.
+
+    Args:
+    params (dict): The parameters of l1_sample_size_calculator, with lists of values for
+        confidence, percent_punish and percent_guarantee.
+    progress (callable, optional): Called with the completed fraction (0 to 1) after each round of the search.
+
+    Returns:
+    dict: A dictionary containing status, message and, as value, the sample size of
+        every combination ("grid") and the success rate at every simulated sample size
+        ("power_curves").
+    """
+    for key in L1_SWEEP_PARAMS:
+        if not params[key]:
+            return {"status": 0, "message": f"ERROR: {key} must contain at least one value"}
+    checks = [{k: v for k, v in params.items() if k not in L1_SWEEP_PARAMS}]
+    checks += [{"confidence": confidence} for confidence in params["confidence"]]
+    checks += [{"percent_punish": percent} for percent in params["percent_punish"]]
+    checks += [{"percent_punish": 100, "percent_guarantee": percent} for percent in params["percent_guarantee"]]
+    for check in checks:
+        error_status, error_message = error_handling(check)
+        if error_status == 0:
+            return {"status": 0, "message": error_message}
+
+    n_sub, _ = number_of_subs(
+        params["level_test"],
+        params["n_subs_per_block"],
+        params["n_blocks_per_district"],
+        params["n_district"],
+    )
+    if n_sub is None:
+        return {"status": 0, "message": "ERROR: \'level test\' should be either \'Block\' or \'District\' or \'State\'"}
+    n_simulations = params["n_simulations"]
+    seed_seq = get_seed_sequence(params.get("seed"))
+    disc_params = (
+        params["min_disc"],
+        params["max_disc"],
+        params["mean_disc"],
+        params["std_disc"],
+        params["distribution"],
+    )
+
+    # Combinations where percent_guarantee exceeds percent_punish are left out
+    pairs = [
+        (percent_punish, percent_guarantee)
+        for percent_punish in params["percent_punish"]
+        for percent_guarantee in params["percent_guarantee"]
+        if percent_guarantee <= percent_punish
+    ]
+    if not pairs:
+        return {"status": 0, "message": "ERROR: percent_guarantee must be between 0 and percent_punish"}
+    counts_of = {
+        pair: (int(np.ceil((pair[0] / 100) * n_sub)), int(np.ceil((pair[1] / 100) * n_sub)))
+        for pair in pairs
+    }
+    punish_values = sorted({n_punish for n_punish, _ in counts_of.values()})
+    punish_index = {n_punish: i for i, n_punish in enumerate(punish_values)}
+
+    # Same streams as l1_sample_size_calculator, so every cell of the grid matches it
+    true_root, meas_root = seed_seq.spawn(2)
+    batches = get_simulation_batches(1, n_sub, n_simulations, true_root)
+
+    def success_rate(caught, n_punish, n_guarantee):
+        return caught[punish_index[n_punish], n_guarantee:].sum() / n_simulations
+
+    # Simulated outcomes by sample size, and [left, right] of every search
+    caught_by_n_samples = {}
+    searches = {
+        (n_punish, n_guarantee, confidence): [params["min_n_samples"], params["max_n_samples"]]
+        for n_punish, n_guarantee in set(counts_of.values())
+        for confidence in params["confidence"]
+    }
+    n_rounds = max(1, int(np.ceil(np.log2(params["max_n_samples"] - params["min_n_samples"] + 1))))
+    round_ = 0
+    with get_executor(params.get("workers", 1)) as executor:
+        while any(left < right for left, right in searches.values()):
+            pending = sorted(
+                {(left + right) // 2 for left, right in searches.values() if left < right}
+                - caught_by_n_samples.keys()
+            )
+            tasks = [
+                (n_sub, punish_values, n_samples, stop - start, disc_params, true_seq, get_l1_meas_seed(meas_root, n_samples, batch))
+                for n_samples in pending
+                for batch, (start, stop, true_seq) in enumerate(batches)
+            ]
+            results = run_tasks(executor, count_l1_caught, tasks)
+            for i, n_samples in enumerate(pending):
+                caught_by_n_samples[n_samples] = np.sum(
+                    results[i * len(batches):(i + 1) * len(batches)], axis=0
+                )
+
+            for (n_punish, n_guarantee, confidence), bounds in searches.items():
+                left, right = bounds
+                if left < right:
+                    mid = (left + right) // 2
+                    if success_rate(caught_by_n_samples[mid], n_punish, n_guarantee) >= confidence:
+                        bounds[1] = mid
+                    else:
+                        bounds[0] = mid + 1
+            round_ += 1
+            if progress:
+                progress(min(round_ / n_rounds, 1.0))
+
+    simulated = sorted(caught_by_n_samples)
+    grid = [
+        {
+            "confidence": confidence,
+            "percent_punish": percent_punish,
+            "percent_guarantee": percent_guarantee,
+            "n_samples": searches[(*counts_of[(percent_punish, percent_guarantee)], confidence)][0],
+        }
+        for percent_punish, percent_guarantee in pairs
+        for confidence in params["confidence"]
+    ]
+    power_curves = [
+        {
+            "percent_punish": percent_punish,
+            "percent_guarantee": percent_guarantee,
+            "n_samples": simulated,
+            "success_rate": [
+                float(success_rate(caught_by_n_samples[n_samples], *counts_of[(percent_punish, percent_guarantee)]))
+                for n_samples in simulated
+            ],
+        }
+        for percent_punish, percent_guarantee in pairs
+    ]
+
+    return {
+        "status": 1,
+        "message": "L1 sample size sweep calculated successfully.",
+        "value": {"grid": grid, "power_curves": power_curves},
+    }
+
+
+def get_l2_meas_sd(true_disc, n_samples):
+    """
+    Standard deviation of the measured discrepancy of each block under the normal
+    approximation of the binomial measurement noise.
+
+    A small floor keeps blocks with a true discrepancy of exactly 0 or 1 comparable.
+    """
+    return np.sqrt(np.maximum(true_disc * (1 - true_disc), 1e-6) / n_samples)
+
+
+def get_l2_analytic_summary(true_disc, n_samples):
+    """
+    Approximate the distribution of measured discrepancies and ranks analytically.
+
+    Measured discrepancies are approximated by independent normals around the true
+    ones. A block's measured rank is one plus the number of blocks measured below it;
+    given its own measurement these are independent Bernoulli draws, so the mean and
+    variance of the rank are obtained by integrating over its own noise with
+    Gauss-Hermite quadrature.
+
+    Args:
+    true_disc (numpy.array): True discrepancy of every block.
+    n_samples (int): Number of samples per block.
+
+    Returns:
+    dict: Bands of measured discrepancies and ranks, and the expected Kendall rank
+    correlation between true and measured discrepancies.
+    """
+    n_blocks = len(true_disc)
+    sd = get_l2_meas_sd(true_disc, n_samples)
+    z = NormalDist().inv_cdf(0.5 + L2_BAND_COVERAGE / 2)
+
+    inv_sd = 1 / sd
+    scaled_disc = true_disc * inv_sd
+
+    nodes, weights = np.polynomial.hermite_e.hermegauss(L2_QUADRATURE_NODES)
+    weights = weights / weights.sum()
+
+    expected_rank = np.empty(n_blocks)
+    rank_sd = np.empty(n_blocks)
+    pair_agreement = 0.0
+    chunk = max(1, MAX_DRAWS_PER_BATCH // (n_blocks * L2_QUADRATURE_NODES))
+    for start in range(0, n_blocks, chunk):
+        rows = np.arange(start, min(start + chunk, n_blocks))
+        # Measurement of each block at every quadrature node, shape (rows, nodes)
+        x = true_disc[rows, None] + sd[rows, None] * nodes
+        # Probability that every other block is measured below it, shape (rows, nodes, blocks)
+        below = x[:, :, None] * inv_sd
+        below -= scaled_disc
+        ndtr(below, out=below)
+        below[np.arange(len(rows)), :, rows] = 0
+        cond_mean = below.sum(axis=2)
+        cond_var = cond_mean - np.einsum("rkj,rkj->rk", below, below)
+        mean = cond_mean @ weights
+        expected_rank[rows] = 1 + mean
+        rank_sd[rows] = np.sqrt(np.maximum(cond_var @ weights + cond_mean**2 @ weights - mean**2, 0))
+
+        # Probability that each pair is measured in its true order
+        gap = np.abs(true_disc[rows, None] - true_disc) / np.sqrt(sd[rows, None]**2 + sd**2)
+        agreement = 2 * ndtr(gap) - 1
+        agreement[np.arange(len(rows)), rows] = 0
+        pair_agreement += agreement.sum()
+
+    return {
+        "meas_disc_mean": true_disc,
+        "meas_disc_lower": np.clip(true_disc - z * sd, 0, 1),
+        "meas_disc_upper": np.clip(true_disc + z * sd, 0, 1),
+        "expected_rank": expected_rank,
+        "rank_lower": np.clip(expected_rank - z * rank_sd, 1, n_blocks),
+        "rank_upper": np.clip(expected_rank + z * rank_sd, 1, n_blocks),
+        "rank_correlation": pair_agreement / (n_blocks * (n_blocks - 1)) if n_blocks > 1 else None,
+    }
+
+
+def get_l2_simulation_summary(true_disc, n_samples, n_simulations, rng):
+    """
+    Summarise the measured discrepancies and ranks over a batch of simulations.
+
+    Args:
+    true_disc (numpy.array): True discrepancy of every block.
+    n_samples (int): Number of samples per block.
+    n_simulations (int): Number of simulated measurements.
+    rng (numpy.random.Generator): Random generator to draw from.
+
+    Returns:
+    dict: Means and percentile bands of measured discrepancies and ranks, and the
+    Kendall rank correlation between true and measured discrepancies.
+    """
+    n_blocks = len(true_disc)
+    quantiles = [50 - L2_BAND_COVERAGE * 50, 50 + L2_BAND_COVERAGE * 50]
+
+    meas_disc = generate_meas_disc(np.broadcast_to(true_disc, (n_simulations, n_blocks)), n_samples, rng)
+    # Ties share the average of their ranks
+    meas_rank = rankdata(meas_disc, axis=1)
+    disc_lower, disc_upper = np.percentile(meas_disc, quantiles, axis=0)
+    rank_lower, rank_upper = np.percentile(meas_rank, quantiles, axis=0)
+
+    summary = {
+        "meas_disc_mean": meas_disc.mean(axis=0),
+        "meas_disc_lower": disc_lower,
+        "meas_disc_upper": disc_upper,
+        "expected_rank": meas_rank.mean(axis=0),
+        "rank_lower": rank_lower,
+        "rank_upper": rank_upper,
+        "rank_correlation": None,
+        "rank_correlation_lower": None,
+        "rank_correlation_upper": None,
+    }
+    if n_blocks > 1:
+        tau = np.array([kendalltau(true_disc, meas).statistic for meas in meas_disc])
+        # Undefined when every block is measured equal
+        tau = tau[~np.isnan(tau)]
+        if len(tau):
+            summary["rank_correlation"] = tau.mean()
+            summary["rank_correlation_lower"], summary["rank_correlation_upper"] = np.percentile(tau, quantiles)
+    return summary
+
+
 def l2_sample_size_calculator(params):
     """
     Calculate the L2 sample size based on given parameters.
 
+    In "sample" mode (the default) a single random draw of measured discrepancies is
+    returned. "analytic" and "simulate" return the expected measured discrepancy and
+    rank of every block with confidence bands, and the Kendall rank correlation between
+    true and measured discrepancies, either from a normal approximation of the
+    measurement noise or from n_simulations simulated measurements.
+
     Args:
     params (dict): A dictionary of input parameters.
 
@@ -391,13 +1166,19 @@ def l2_sample_size_calculator(params):
     if error_status == 0:
         return {"status": 0, "message": error_message}
 
-    n_sub = number_of_subs(
+    n_sub, _ = number_of_subs(
         params["level_test"],
         params["n_subs_per_block"],
         params["n_blocks_per_district"],
         params["n_district"],
     )
+    if n_sub is None:
+        return {"status": 0, "message": "ERROR: \'level test\' should be either \'Block\' or \'District\' or \'State\'"}
     n_blocks = n_sub // params["n_subs_per_block"]
+    n_samples = params["total_samples"] // n_blocks
+    if n_samples == 0:
+        return {"status": 0, "message": "ERROR: total_samples must be at least the number of blocks"}
+    rng = get_rng(params.get("seed"))
 
     true_disc = generate_true_disc(
         n_blocks,
@@ -406,20 +1187,74 @@ def l2_sample_size_calculator(params):
         params["average_truth_score"],
         params["sd_across_blocks"],
         "normal",
+        rng,
     )
-    meas_disc = generate_meas_disc(true_disc, params["total_samples"] // n_blocks)
+
+    mode = params.get("mode", "sample")
+    if mode == "sample":
+        meas_disc = generate_meas_disc(true_disc, n_samples, rng)
+        return {
+            "status": 1,
+            "message": "L2 sample size calculated successfully.",
+            "value": {
+                "true_disc": true_disc.tolist(),
+                "meas_disc": meas_disc.tolist(),
+                "n_samples": n_samples,
+            },
+        }
+
+    if mode == "analytic":
+        summary = get_l2_analytic_summary(true_disc, n_samples)
+    else:
+        summary = get_l2_simulation_summary(true_disc, n_samples, params["n_simulations"], rng)
+
+    value = {
+        "mode": mode,
+        "n_samples": n_samples,
+        "true_disc": true_disc.tolist(),
+        "true_rank": (get_rank_lookup(np.argsort(true_disc)) + 1).tolist(),
+    }
+    for key, values in summary.items():
+        value[key] = values.tolist() if isinstance(values, np.ndarray) else (None if values is None else float(values))
 
     return {
         "status": 1,
         "message": "L2 sample size calculated successfully.",
-        "value": {
-            "true_disc": true_disc.tolist(),
-            "meas_disc": meas_disc.tolist(),
-            "n_samples": params["total_samples"] // n_blocks,
-        },
+        "value": value,
     }
 
-def third_party_sampling_strategy(params):
+def get_selection_frequency(meas_order, n_blocks_reward, n_blocks):
+    """
+    Fraction of simulations in which each block is among the n_blocks_reward best measured.
+
+    Args:
+    meas_order (numpy.array): Measured order of the blocks, shape (n_cond, n_blocks, n_simulations).
+    n_blocks_reward (int): Number of blocks rewarded.
+    n_blocks (int): Number of blocks.
+
+    Returns:
+    numpy.array: Selection frequencies, shape (n_cond, n_blocks).
+    """
+    n_cond, _, n_simulations = meas_order.shape
+    top = meas_order[:, n_blocks - n_blocks_reward:, :].reshape(n_cond, -1).astype(np.int64)
+    codes = (top + np.arange(n_cond)[:, None] * n_blocks).ravel()
+    counts = np.bincount(codes, minlength=n_cond * n_blocks).reshape(n_cond, n_blocks)
+    return counts / n_simulations
+
+
+def simulate_third_party_sampling(params, progress=None):
+    """
+    Simulate third-party sampling strategies and rank the measured units.
+
+    Args:
+    params (dict): A dictionary of input parameters.
+    progress (callable, optional): Called with the completed fraction (0 to 1) after each batch of simulations.
+
+    Returns:
+    dict: A dictionary containing status, message, and the simulation results as NumPy
+    arrays. meas_order holds the block indices sorted by measured truth score, shape
+    (n_cond, n_blocks, n_simulations), and is omitted when include_meas_order is False.
+    """
     error_status, error_message = error_handling(params)
     if error_status == 0:
         return {"status": 0, "message": error_message}
@@ -431,24 +1266,34 @@ def third_party_sampling_strategy(params):
         params["n_district"]
     )
 
+    # Independent streams for the population and for every tested condition
+    population_seq, simulation_seq = get_seed_sequence(params.get("seed")).spawn(2)
+
     real_order, real_ts = get_real_ts(
         n_blocks,
         params["average_truth_score"],
         params["sd_across_blocks"],
         n_sub_per_block,
-        params["sd_within_block"]
+        params["sd_within_block"],
+        get_rng(population_seq)
     )
 
     list_n_sub = get_list_n_sub(n_sub_per_block, params["min_sub_per_block"])
     list_n_samples = get_list_n_samples(params["total_samples"], n_blocks, list_n_sub)
 
-    meas_order = {}
+    # Every batch of simulations of every condition is an independent task
+    # Block indices are stored in the smallest integer type that holds them
+    meas_order = np.zeros([len(list_n_sub), n_blocks, params["n_simulations"]], dtype=np.min_scalar_type(max(n_blocks - 1, 0)))
+    tasks, slots = [], []
+    condition_seqs = simulation_seq.spawn(len(list_n_sub))
     for i, n_sub in enumerate(list_n_sub):
-        n_samples = list_n_samples[i]
-        meas_order[i] = np.zeros([n_blocks, params["n_simulations"]])
-        
-        for sim in range(params["n_simulations"]):
-            meas_order[i][:, sim] = np.argsort(get_meas_ts(n_blocks, n_sub_per_block, n_sub, n_samples, real_ts))
+        for start, stop, batch_seq in get_simulation_batches(n_blocks, n_sub, params["n_simulations"], condition_seqs[i]):
+            tasks.append((n_blocks, n_sub_per_block, n_sub, list_n_samples[i], real_ts, stop - start, batch_seq))
+            slots.append((i, start, stop))
+
+    with get_executor(params.get("workers", 1)) as executor:
+        for (i, start, stop), order in zip(slots, run_tasks(executor, get_meas_order_batch, tasks, progress)):
+            meas_order[i][:, start:stop] = order
 
     mean_rank, errorbars = get_ranks(meas_order, real_order, n_blocks, params["percent_blocks_plot"], list_n_sub, params["n_simulations"], params["errorbar_type"])
 
@@ -463,49 +1308,107 @@ def third_party_sampling_strategy(params):
         params["errorbar_type"]
     )
 
-    # Create first figure (existing plot)
-    figImg = make_plot(mean_rank, errorbars, list_n_sub, list_n_samples, n_blocks, params["percent_blocks_plot"], params["errorbar_type"])
-    
-    # Create second figure using matplotlib
-    fig2 = make_plot_num_real_units(
-        list_n_sub, 
-        list_n_samples, 
-        mean_n_real, 
-        errorbars_n_real,
-        params['n_blocks_reward'],
-        params["errorbar_type"],
-        n_blocks
-    )
-    
-    # Save both figures to base64
-    buf1 = BytesIO()
-    figImg.savefig(buf1, format="png")
-    plt.close(figImg)
-    plot_data1 = base64.b64encode(buf1.getbuffer()).decode("ascii")
-    
-    buf2 = BytesIO()
-    fig2.savefig(buf2, format="png")
-    plt.close(fig2)
-    plot_data2 = base64.b64encode(buf2.getbuffer()).decode("ascii")
+    value = {
+        "seed": params.get("seed"),
+        "real_order": np.asarray(real_order, dtype=np.int32),
+        "list_n_sub": np.asarray(list_n_sub),
+        "list_n_samples": np.asarray(list_n_samples),
+        "mean_rank": mean_rank,
+        "errorbars": errorbars,
+        "mean_n_real": mean_n_real,
+        "errorbars_n_real": errorbars_n_real,
+        "selection_frequency": get_selection_frequency(meas_order, params["n_blocks_reward"], n_blocks),
+    }
+    if params.get("include_meas_order", True):
+        value["meas_order"] = meas_order
+
+    return {
+        "status": 1,
+        "message": "3P Sampling Strategy calculated successfully.",
+        "value": value,
+    }
+
+
+def third_party_sampling_strategy(params, progress=None):
+    """
+    Simulate third-party sampling strategies and rank the measured units.
+
+    Args:
+    params (dict): A dictionary of input parameters.
+    progress (callable, optional): Called with the completed fraction (0 to 1) after each batch of simulations.
+
+    Returns:
+    dict: A dictionary containing status, message, and the JSON-serialisable simulation
+    results, with figures when include_figures is set.
+    """
+    result = simulate_third_party_sampling(params, progress)
+    if result["status"] == 0:
+        return result
+    arrays = result["value"]
 
     # Get values of second figure in a pandas dataframe
-    second_fig_values = get_num_real_units_table(list_n_sub, list_n_samples, mean_n_real, errorbars_n_real, params["errorbar_type"])
+    second_fig_values = get_num_real_units_table(arrays["list_n_sub"].tolist(), arrays["list_n_samples"].tolist(), arrays["mean_n_real"], arrays["errorbars_n_real"], params["errorbar_type"])
     json_response = second_fig_values.to_dict(orient='records')
 
+    value = {"seed": arrays["seed"]}
+    for key in ("real_order", "list_n_sub", "list_n_samples", "mean_rank", "errorbars", "mean_n_real", "errorbars_n_real", "selection_frequency"):
+        value[key] = arrays[key].tolist()
+    if "meas_order" in arrays:
+        value["meas_order"] = {str(i): order.tolist() for i, order in enumerate(arrays["meas_order"])}
+    value["table"] = json_response
+
+    # Figures are usually fetched separately with render_third_party_figure
+    if params.get("include_figures"):
+        value["figureImg"] = base64.b64encode(render_third_party_figure(params, value, "ranks")).decode("ascii")
+        value["figure2"] = base64.b64encode(render_third_party_figure(params, value, "real_units")).decode("ascii")
+
     return {
         "status": 1,
-        "message": "3P Sampling Strategy calculated successfully.",
-        "value": {
-            "real_order": [int(x) for x in real_order],
-            "meas_order": {str(k): v.tolist() for k, v in meas_order.items()},
-            "list_n_sub": [int(x) for x in list_n_sub],
-            "list_n_samples": [int(x) for x in list_n_samples],
-            "mean_rank": mean_rank.tolist(),
-            "errorbars": errorbars.tolist(),
-            "mean_n_real": mean_n_real.tolist(),
-            "errorbars_n_real": errorbars_n_real.tolist(),
-            "figureImg": plot_data1,
-            "figure2": plot_data2,
-            "table": json_response
-        },
-    }
\ No newline at end of file
+        "message": result["message"],
+        "value": value,
+    }
+
+
+def render_third_party_figure(params, value, name, fmt="png"):
+    """
+    Render a figure of a third-party sampling strategy result.
+
+    Args:
+    params (dict): Input parameters of the simulation.
+    value (dict): The "value" returned by third_party_sampling_strategy.
+    name (str): "ranks" for the real ranks of the best measured units, "real_units"
+        for the number of real top units among the rewarded ones.
+    fmt (str): Image format, "png" or "svg".
+
+    Returns:
+    bytes: The rendered image.
+    """
+    n_blocks = len(value["real_order"])
+    with _figure_lock:
+        if name == "ranks":
+            fig = make_plot(
+                np.asarray(value["mean_rank"]),
+                np.asarray(value["errorbars"]),
+                value["list_n_sub"],
+                value["list_n_samples"],
+                n_blocks,
+                params["percent_blocks_plot"],
+                params["errorbar_type"]
+            )
+        elif name == "real_units":
+            fig = make_plot_num_real_units(
+                value["list_n_sub"],
+                value["list_n_samples"],
+                np.asarray(value["mean_n_real"]),
+                np.asarray(value["errorbars_n_real"]),
+                params['n_blocks_reward'],
+                params["errorbar_type"],
+                n_blocks
+            )
+        else:
+            raise ValueError(f"Unknown figure '{name}', expected one of {', '.join(THIRD_PARTY_FIGURES)}")
+
+        buf = BytesIO()
+        fig.savefig(buf, format=fmt)
+        plt.close(fig)
+    return buf.getvalue()
\ No newline at end of file
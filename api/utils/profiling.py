@@ -0,0 +1,183 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from api.utils.cardinality import HyperLogLog
+from api.utils.file_storage import INGEST_CHUNK_ROWS, merge_dtypes
+from api.utils.key_index import ROW_KEPT, HashedKeyIndex, normalise_floats
+
+# Bump when the profile fields change, so stored profiles are recomputed
+PROFILE_VERSION = 3
+
+# Distinct values of a column counted exactly; beyond this they are estimated
+# with a HyperLogLog sketch
+PROFILE_MAX_DISTINCT = 100_000
+
+# Distinct hashes of a column buffered before they are merged into the sorted set
+MIN_PENDING_DISTINCT = 65_536
+
+# dtypes whose zeros are counted, as in zeroEntries
+ZERO_COUNT_DTYPES = ("int64", "float64")
+
+
+def combine_hashes(column_hashes: List[np.ndarray], n_rows: int) -> np.ndarray:
+    """
+    Combine per-column uint64 value hashes into one hash per row.
+
+    Uses the same mixing as pandas.util.hash_pandas_object does for dataframes,
+    so each value only needs to be hashed once.
+    """
+    out = np.full(n_rows, 0x345678, dtype=np.uint64)
+    mult = np.uint64(1000003)
+    n_columns = len(column_hashes)
+    for i, hashes in enumerate(column_hashes):
+        inverse = n_columns - i
+        out ^= hashes
+        out *= mult
+        mult += np.uint64(82520 + inverse + inverse)
+    return out + np.uint64(97531)
+
+
+class DistinctCounter:
+    """
+    Count of distinct value hashes, exact up to max_distinct of them.
+
+    Beyond that the hashes seen so far are loaded into a HyperLogLog sketch,
+    which estimates the count from then on in constant memory.
+    """
+
+    def __init__(self, max_distinct: int = PROFILE_MAX_DISTINCT):
+        self.max_distinct = max_distinct
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._pending: List[np.ndarray] = []
+        self._pending_size = 0
+        self._sketch: Optional[HyperLogLog] = None
+        self._lower_bound = 0
+
+    @property
+    def exact(self) -> bool:
+        return self._sketch is None
+
+    def add(self, hashes: np.ndarray) -> None:
+        if len(hashes) == 0:
+            return
+        if not self.exact:
+            self._sketch.add(hashes)
+            return
+        unique = np.unique(hashes)
+        self._pending.append(unique)
+        self._pending_size += len(unique)
+        # Merging once the buffer outgrows the set keeps the total cost O(n log n)
+        if self._pending_size > max(len(self._seen), MIN_PENDING_DISTINCT):
+            self._merge()
+
+    def _merge(self) -> None:
+        self._seen = np.unique(np.concatenate([self._seen, *self._pending]))
+        self._pending = []
+        self._pending_size = 0
+        if len(self._seen) > self.max_distinct:
+            self._sketch = HyperLogLog()
+            self._sketch.add(self._seen)
+            # The sketch can underestimate, but never below what was counted exactly
+            self._lower_bound = len(self._seen)
+            self._seen = np.empty(0, dtype=np.uint64)
+
+    def count(self) -> int:
+        if self.exact:
+            self._merge()
+            return len(self._seen)
+        return max(self._lower_bound, round(self._sketch.estimate()))
+
+
+class DataProfiler:
+    """
+    Profile of a dataset computed in a single pass over its chunks.
+
+    Every value is hashed once; the hashes feed both the distinct count of its
+    column and the row hashes used to count duplicated rows. The profile holds,
+    for every column, its dtype, number of missing values, number of zeros
+    (int64 and float64 columns only, as zeroEntries) and number of distinct
+    non-missing values (estimated beyond max_distinct, see DistinctCounter),
+    plus the number of rows duplicating an earlier row (as
+    DataFrame.duplicated().sum(), up to 64-bit hash collisions).
+
+    Chunks must share their columns and dtypes, e.g. the chunks written by
+    csv_to_parquet.
+    """
+
+    def __init__(self, max_distinct: int = PROFILE_MAX_DISTINCT):
+        self.max_distinct = max_distinct
+        self.n_rows = 0
+        self._columns: Dict[str, Dict[str, Any]] = {}
+        self._distinct: Dict[str, DistinctCounter] = {}
+        self._index = HashedKeyIndex()
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Add the next rows of the dataset."""
+        column_hashes = []
+        for name in chunk.columns:
+            series = chunk[name]
+            dtype = str(series.dtype)
+            stats = self._columns.setdefault(
+                name, {"dtype": None, "null_count": 0, "zero_count": 0}
+            )
+            stats["dtype"] = merge_dtypes(stats["dtype"], dtype)
+
+            missing = series.isna().to_numpy()
+            stats["null_count"] += int(missing.sum())
+            if dtype in ZERO_COUNT_DTYPES:
+                stats["zero_count"] += int((series == 0).sum())
+
+            hashes = pd.util.hash_pandas_object(normalise_floats(series), index=False).to_numpy(
+                np.uint64
+            )
+            counter = self._distinct.setdefault(name, DistinctCounter(self.max_distinct))
+            counter.add(hashes[~missing])
+            column_hashes.append(hashes)
+
+        if column_hashes:
+            self._index.add(combine_hashes(column_hashes, len(chunk)))
+        self.n_rows += len(chunk)
+
+    def result(self) -> Dict[str, Any]:
+        """Return the profile as a JSON-serialisable dict and release the row index."""
+        with self._index:
+            kept = int(np.count_nonzero(self._index.resolve("first") & ROW_KEPT))
+        columns = []
+        for name, stats in self._columns.items():
+            counter = self._distinct[name]
+            columns.append(
+                {
+                    "name": str(name),
+                    **stats,
+                    "distinct_count": counter.count(),
+                    "distinct_exact": counter.exact,
+                }
+            )
+        return {
+            "version": PROFILE_VERSION,
+            "n_rows": self.n_rows,
+            "n_columns": len(columns),
+            "duplicate_rows": self.n_rows - kept,
+            "columns": columns,
+        }
+
+
+def profile_dataframe(df: pd.DataFrame, chunksize: int = INGEST_CHUNK_ROWS) -> Dict[str, Any]:
+    """
+    Profile an in-memory dataframe.
+
+    Args:
+    df (pd.DataFrame): Input dataframe
+    chunksize (int): Rows hashed at a time
+
+    Returns:
+    Dict[str, Any]: The profile, see DataProfiler
+    """
+    profiler = DataProfiler()
+    if len(df) == 0:
+        profiler.add(df)
+    for start in range(0, len(df), chunksize):
+        profiler.add(df.iloc[start : start + chunksize])
+    return profiler.result()
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from api.database import SimulationResult
+
+# Bump when a simulator changes so results cached by older code are never served
+RESULT_CACHE_VERSION = 4
+
+# Request fields that change how a result is computed but not the result itself
+IGNORED_PARAMS = ("workers",)
+
+
+def params_hash(kind: str, params: dict, ignore: Iterable[str] = IGNORED_PARAMS) -> str:
+    """
+    Return a canonical hash of the parameters of a simulation request.
+
+    Args:
+    kind (str): Name of the simulation, e.g. "l1-sample-size".
+    params (dict): Request parameters, usually the dumped pydantic model.
+    ignore (Iterable[str]): Parameters left out of the hash.
+
+    Returns:
+    str: Hex digest identifying the request.
+    """
+    canonical = json.dumps(
+        {
+            "kind": kind,
+            "version": RESULT_CACHE_VERSION,
+            "params": {k: v for k, v in params.items() if k not in ignore},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class SimulationResultCache:
+    """
+    Persistent cache of simulation responses and rendered figures stored in the database.
+
+    Only seeded requests are cached, since they are the only deterministic ones.
+    Entries expire ttl_seconds after they were computed and the least recently used
+    entries are evicted beyond max_entries. Hit and miss counters are kept per
+    process.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_cacheable(params: dict) -> bool:
+        return params.get("seed") is not None
+
+    def _cutoff(self) -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+
+    def _count(self, counter: Counter, kind: str):
+        with self._lock:
+            counter[kind] += 1
+
+    def get_bytes(self, db: Session, kind: str, key: str) -> Optional[bytes]:
+        """
+        Return the cached content for key, or None if it is missing or expired.
+
+        Args:
+        db (Session): Database session.
+        kind (str): Name of the simulation or artifact.
+        key (str): Hash returned by params_hash.
+
+        Returns:
+        Optional[bytes]: The cached content.
+        """
+        entry = (
+            db.query(SimulationResult)
+            .filter(
+                SimulationResult.kind == kind,
+                SimulationResult.params_hash == key,
+                SimulationResult.created_at >= self._cutoff(),
+            )
+            .first()
+        )
+        if entry is None:
+            self._count(self.misses, kind)
+            return None
+
+        entry.hit_count += 1
+        entry.last_accessed_at = datetime.now(timezone.utc)
+        db.commit()
+        self._count(self.hits, kind)
+        return zlib.decompress(entry.result)
+
+    def get(self, db: Session, kind: str, key: str) -> Optional[dict]:
+        """Return the cached JSON response for key, or None if it is missing or expired."""
+        content = self.get_bytes(db, kind, key)
+        return None if content is None else json.loads(content)
+
+    def put_bytes(self, db: Session, kind: str, key: str, content: bytes) -> None:
+        """
+        Store content and evict expired and least recently used entries.
+
+        Args:
+        db (Session): Database session.
+        kind (str): Name of the simulation or artifact.
+        key (str): Hash returned by params_hash.
+        content (bytes): Content to cache.
+        """
+        payload = zlib.compress(content)
+        now = datetime.now(timezone.utc)
+        db.add(
+            SimulationResult(
+                kind=kind,
+                params_hash=key,
+                result=payload,
+                size_bytes=len(payload),
+                hit_count=0,
+                created_at=now,
+                last_accessed_at=now,
+            )
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            # Stored by a concurrent request, or an expired entry for the same key
+            db.rollback()
+            db.query(SimulationResult).filter(
+                SimulationResult.kind == kind, SimulationResult.params_hash == key
+            ).update(
+                {
+                    "result": payload,
+                    "size_bytes": len(payload),
+                    "created_at": now,
+                    "last_accessed_at": now,
+                }
+            )
+            db.commit()
+        self.evict(db)
+
+    def put(self, db: Session, kind: str, key: str, result: dict) -> None:
+        """Store a JSON-serialisable response."""
+        self.put_bytes(db, kind, key, json.dumps(result).encode("utf-8"))
+
+    def evict(self, db: Session) -> int:
+        """
+        Delete expired entries and the least recently used ones beyond max_entries.
+
+        Returns:
+        int: Number of deleted entries.
+        """
+        deleted = (
+            db.query(SimulationResult)
+            .filter(SimulationResult.created_at < self._cutoff())
+            .delete(synchronize_session=False)
+        )
+        excess = db.query(SimulationResult).count() - self.max_entries
+        if excess > 0:
+            oldest = (
+                db.query(SimulationResult.id)
+                .order_by(SimulationResult.last_accessed_at)
+                .limit(excess)
+                .subquery()
+            )
+            deleted += (
+                db.query(SimulationResult)
+                .filter(SimulationResult.id.in_(db.query(oldest.c.id)))
+                .delete(synchronize_session=False)
+            )
+        db.commit()
+        return deleted
+
+    def clear(self, db: Session) -> None:
+        db.query(SimulationResult).delete(synchronize_session=False)
+        db.commit()
+
+    def stats(self, db: Session) -> dict:
+        entries, size_bytes = db.query(
+            func.count(SimulationResult.id), func.coalesce(func.sum(SimulationResult.size_bytes), 0)
+        ).one()
+        with self._lock:
+            kinds = set(self.hits) | set(self.misses)
+            return {
+                "entries": entries,
+                "bytes": int(size_bytes),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": sum(self.hits.values()),
+                "misses": sum(self.misses.values()),
+                "by_kind": {
+                    kind: {"hits": self.hits[kind], "misses": self.misses[kind]}
+                    for kind in sorted(kinds)
+                },
+            }
@@ -114,12 +114,17 @@ def check_specific_columns_as_unique_id(df):
         # total_start_time = time.perf_counter()
         with st.spinner(f"Checking if {', '.join(columns)} form a unique ID..."):
 
-            # file_read_start = time.perf_counter()
-            df_clean = df.replace([np.inf, -np.inf], np.nan).dropna()
-            # file_read_time = time.perf_counter() - file_read_start
+            file_id = st.session_state.get("uploaded_file_id")
+            if file_id is not None:
+                # The API reads the stored file, so the dataset is not sent again
+                payload = {"file_id": file_id, "columns": columns}
+            else:
+                # file_read_start = time.perf_counter()
+                df_clean = df.replace([np.inf, -np.inf], np.nan).dropna()
+                # file_read_time = time.perf_counter() - file_read_start
 
-            data = df_clean.where(pd.notnull(df_clean), None).to_dict('records')
-            payload = {"data": data, "columns": columns}
+                data = df_clean.where(pd.notnull(df_clean), None).to_dict('records')
+                payload = {"data": data, "columns": columns}
 
             response, api_call_time = callAPIWithParam(payload, UNIQUE_ID_CHECK_ENDPOINT)
             
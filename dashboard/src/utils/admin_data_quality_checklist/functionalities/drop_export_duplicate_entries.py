@@ -16,6 +16,9 @@ DROP_EXPORT_DUPLICATES_ENDPOINT = f"{API_BASE_URL}/drop_export_duplicates"
 GET_PROCESSED_DATA_ENDPOINT = f"{API_BASE_URL}/get_processed_data"
 GET_DATAFRAME_ENDPOINT = f"{API_BASE_URL}/get_dataframe"
 
+# Only the first rows of each result are fetched for the tables
+PREVIEW_ROWS = 1000
+
 def handle_click(newSelection):
     st.session_state.option_selection = newSelection
 
@@ -100,16 +103,16 @@ def drop_export_duplicate_entries(uploaded_file, df):
                         st.session_state.drop_export_entries_complete = True
 
                         # api_call_start_1 = time.perf_counter()
-                        unique_df = fetch_dataframe('unique',GET_DATAFRAME_ENDPOINT)
+                        unique_df = fetch_dataframe('unique',GET_DATAFRAME_ENDPOINT,result['artifact_id'],PREVIEW_ROWS)
                         # api_call_end_1 = time.perf_counter() - api_call_start_1
 
                         # api_call_start_2 = time.perf_counter()
-                        duplicate_df = fetch_dataframe('duplicate',GET_DATAFRAME_ENDPOINT)
+                        duplicate_df = fetch_dataframe('duplicate',GET_DATAFRAME_ENDPOINT,result['artifact_id'],PREVIEW_ROWS)
                         # api_call_end_2 = time.perf_counter() - api_call_start_2
 
                         # Visualize the results
-                        unique_rows = len(unique_df)
-                        duplicate_rows = len(duplicate_df)
+                        unique_rows = result["unique_count"]
+                        duplicate_rows = result["duplicate_count"]
 
                         fig = plot_pie_chart([f"Unique Entries", f"Duplicate Entries"], [unique_rows, duplicate_rows], "Dataset Composition")
                         st.plotly_chart(fig)
@@ -131,13 +134,15 @@ def drop_export_duplicate_entries(uploaded_file, df):
                                 unique_df.index.name = 'SN'
                                 unique_df.index = unique_df.index + 1
                                 st.dataframe(unique_df, hide_index=True)
+                                if unique_rows > len(unique_df):
+                                    st.caption(f"Showing the first {len(unique_df)} of {unique_rows} rows")
                             except Exception as e:
                                 st.error(f"Error displaying unique rows: {str(e)}")
 
                         col4.subheader("Duplicate Entries")
                         col4.text("In case you want to use them later for your reference, you can view or download the duplicate rows dropped from the original dataset here")
 
-                        if len(duplicate_df)>0:
+                        if duplicate_rows>0:
                             with col4.expander("Show/export duplicate entries"):
                                 st.write("")
                                 paraField, colBtn = st.columns([2,1])
@@ -150,6 +155,8 @@ def drop_export_duplicate_entries(uploaded_file, df):
                                     duplicate_df.index.name = 'SN'
                                     duplicate_df.index = duplicate_df.index + 1
                                     st.dataframe(duplicate_df, hide_index=False)
+                                    if duplicate_rows > len(duplicate_df):
+                                        st.caption(f"Showing the first {len(duplicate_df)} of {duplicate_rows} rows")
                                 except Exception as e:
                                     st.error(f"Error displaying duplicate rows: {str(e)}")
                         else:
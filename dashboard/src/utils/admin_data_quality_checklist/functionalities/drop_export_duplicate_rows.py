@@ -17,6 +17,9 @@ DROP_EXPORT_DUPLICATE_ROWS_ENDPOINT = f"{API_BASE_URL}/drop_export_duplicate_row
 GET_PROCESSED_DATA_ENDPOINT = f"{API_BASE_URL}/get_processed_data"
 GET_DATAFRAME_ENDPOINT = f"{API_BASE_URL}/get_dataframe"
 
+# Only the first rows of each result are fetched for the tables
+PREVIEW_ROWS = 1000
+
 def handle_click(newSelection):
     st.session_state.option_selection = newSelection
 
@@ -73,16 +76,16 @@ def drop_export_duplicate_rows(uploaded_file):
                     st.session_state.drop_export_rows_complete = True
 
                     # api_call_start_1 = time.perf_counter()
-                    unique_df = fetch_dataframe('unique',GET_DATAFRAME_ENDPOINT)
+                    unique_df = fetch_dataframe('unique',GET_DATAFRAME_ENDPOINT,result['artifact_id'],PREVIEW_ROWS)
                     # api_call_end_1 = time.perf_counter() - api_call_start_1
 
                     # api_call_start_2 = time.perf_counter()
-                    duplicate_df = fetch_dataframe('duplicate',GET_DATAFRAME_ENDPOINT)
+                    duplicate_df = fetch_dataframe('duplicate',GET_DATAFRAME_ENDPOINT,result['artifact_id'],PREVIEW_ROWS)
                     # api_call_end_2 = time.perf_counter() - api_call_start_2
                     
                     # Visualize the results
-                    unique_rows = len(unique_df)
-                    duplicate_rows = len(duplicate_df)
+                    unique_rows = result["unique_count"]
+                    duplicate_rows = result["duplicate_count"]
 
                     fig = plot_pie_chart([f"Unique Rows", f"Duplicate Rows"], [unique_rows, duplicate_rows], "Dataset Composition")
                     st.plotly_chart(fig)
@@ -102,8 +105,10 @@ def drop_export_duplicate_rows(uploaded_file):
                         unique_df.index.name = 'SN'
                         unique_df.index = unique_df.index + 1
                         st.dataframe(unique_df, hide_index=False)
+                        if unique_rows > len(unique_df):
+                            st.caption(f"Showing the first {len(unique_df)} of {unique_rows} rows")
 
-                    if len(duplicate_df)>0:
+                    if duplicate_rows>0:
                         st.subheader("Duplicate Rows")
                         with st.expander("Duplicate Rows:"):
 
@@ -118,6 +123,8 @@ def drop_export_duplicate_rows(uploaded_file):
                             duplicate_df.index.name = 'SN'
                             duplicate_df.index = duplicate_df.index + 1
                             st.dataframe(duplicate_df, hide_index=False)
+                            if duplicate_rows > len(duplicate_df):
+                                st.caption(f"Showing the first {len(duplicate_df)} of {duplicate_rows} rows")
                     # dataframe_end = time.perf_counter() - dataframe_start
                 else:
                     st.error(f"Error: {response.status_code} - {response.text}")
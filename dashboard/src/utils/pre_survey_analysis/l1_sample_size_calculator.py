@@ -29,6 +29,7 @@ def l1_sample_size_calculator():
     mean_disc = st.slider("Mean discrepancy score", min_value=min_disc, max_value=max_disc, value=(min_disc + max_disc) / 2)
     std_disc = st.slider("Standard deviation of discrepancy score", min_value=0.0, max_value=(max_disc - min_disc) / 2, value=(max_disc - min_disc) / 4)
     distribution = st.selectbox("Distribution", ["uniform", "normal"], help="Distribution of discrepancy scores to be used for simulation. Currently, only uniform distribution is implemented. We will implement normal and other distributions in future versions.")
+    seed = st.number_input("Random seed", help="Seed of the simulation. Running the same inputs with the same seed gives the same result, which is then returned from the cache; change it to draw new simulations. Range >= 0", min_value=0, value=0)
 
     if st.button("Calculate L1 Sample Size"):
         input_data = {
@@ -46,7 +47,8 @@ def l1_sample_size_calculator():
             "max_disc": max_disc,
             "mean_disc": mean_disc,
             "std_disc": std_disc,
-            "distribution": distribution
+            "distribution": distribution,
+            "seed": seed
         }
         
         # Error handling
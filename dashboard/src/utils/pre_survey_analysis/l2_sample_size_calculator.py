@@ -26,19 +26,21 @@ def l2_sample_size_calculator():
     n_district = st.number_input("Number of districts", help="Number of districts. Range >= 1", min_value=1, value=1)
     n_simulations = st.number_input("Number of simulations", help="By default, this should be set to 100. The number of times the algorithm will be run to estimate the number of samples required. Higher n_simulations will give a more accurate answer, but will take longer to run. Range > 1", min_value=1, value=100)
     min_sub_per_block = st.number_input("Minimum subordinates per block", help="Minimum number of subordinates to be measured in each block. By default, this should be set to 1. 0 < Range < n_sub_per_block", min_value=1, value=1)
+    mode = st.selectbox("Mode", ["sample", "analytic", "simulate"], help="'sample' shows a single random measurement of every block. 'analytic' shows the expected measurement with 95% bands from a normal approximation of the measurement noise, and 'simulate' estimates them from the given number of simulations.")
 
     if st.button("Calculate L2 Sample Size"):
         input_data = {
             "total_samples": total_samples,
             "average_truth_score": average_truth_score,
-            "variance_across_blocks": variance_across_blocks,
-            "variance_within_block": variance_within_block,
+            "sd_across_blocks": variance_across_blocks,
+            "sd_within_block": variance_within_block,
             "level_test": level_test,
             "n_subs_per_block": n_subs_per_block,
             "n_blocks_per_district": n_blocks_per_district,
             "n_district": n_district,
             "n_simulations": n_simulations,
-            "min_sub_per_block": min_sub_per_block
+            "min_sub_per_block": min_sub_per_block,
+            "mode": mode
         }
             
         # Error handling
@@ -57,7 +59,24 @@ def l2_sample_size_calculator():
             # Create plot
             fig = go.Figure()
             fig.add_trace(go.Scatter(x=list(range(len(result['value']['true_disc']))), y=result['value']['true_disc'], mode='lines', name='True Discrepancy'))
-            fig.add_trace(go.Scatter(x=list(range(len(result['value']['meas_disc']))), y=result['value']['meas_disc'], mode='markers', name='Measured Discrepancy'))
+            if mode == "sample":
+                fig.add_trace(go.Scatter(x=list(range(len(result['value']['meas_disc']))), y=result['value']['meas_disc'], mode='markers', name='Measured Discrepancy'))
+            else:
+                value = result['value']
+                fig.add_trace(go.Scatter(
+                    x=list(range(len(value['meas_disc_mean']))),
+                    y=value['meas_disc_mean'],
+                    mode='markers',
+                    name='Measured Discrepancy (95% band)',
+                    error_y=dict(
+                        type='data',
+                        symmetric=False,
+                        array=[upper - mean for upper, mean in zip(value['meas_disc_upper'], value['meas_disc_mean'])],
+                        arrayminus=[mean - lower for lower, mean in zip(value['meas_disc_lower'], value['meas_disc_mean'])],
+                    ),
+                ))
+                if value['rank_correlation'] is not None:
+                    st.metric("Expected rank correlation (Kendall's tau) between true and measured discrepancy", round(value['rank_correlation'], 3))
             fig.update_layout(
                 title="True vs Measured Discrepancy",
                 xaxis_title=f"{level_test} Index",
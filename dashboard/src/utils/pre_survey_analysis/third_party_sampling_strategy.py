@@ -75,6 +75,8 @@ def third_party_sampling_strategy():
         col13, col14, col15 = st.columns(3)
         with col13:
             n_blocks_reward = st.number_input("Number of Unit Rewarded", min_value=1, value=1, help="The number of units to be rewarded. The second chart displayed will show you how many of these rewarded units are expected to be real top rankers, as per the simulated truth scores.")
+        with col14:
+            seed = st.number_input("Random seed", min_value=0, value=0, help="Seed of the simulation. Running the same inputs with the same seed gives the same results, which are then returned from the cache; change it to draw new simulations.")
         
         
         if st.form_submit_button("Predict Third-Party Sampling Strategy"):
@@ -91,7 +93,9 @@ def third_party_sampling_strategy():
                 "min_sub_per_block": min_sub_per_block,
                 "percent_blocks_plot": percent_blocks_plot, 
                 "errorbar_type": errorbar_type,
-                "n_blocks_reward": n_blocks_reward
+                "n_blocks_reward": n_blocks_reward,
+                "seed": seed,
+                "include_meas_order": False
             }
             
             error_status, error_message = check_errors(input_data)
@@ -106,7 +110,9 @@ def third_party_sampling_strategy():
                 result = response.json()
                 st.info(result['message'])
 
-                fig1 = base64.b64decode(result['value']['figureImg'])
+                # Figures are rendered on request, from the seed the simulation ran with
+                figure_input = dict(input_data, seed=result['value']['seed'])
+                fig1 = requests.post(f"{THIRD_PARTY_SAMPLING_ENDPOINT}/figures/ranks", json=figure_input).content
                 image1 = Image.open(BytesIO(fig1))
                 st.image(image1, caption="Third-Party Sampling Strategy Plot", use_container_width=True)
                 image_bytes = BytesIO()
@@ -116,7 +122,7 @@ def third_party_sampling_strategy():
                 download_link1 = f'<a href="data:image/png;base64,{encoded_image1}" class="downloadLink" download="third_party_sampling_plot.png">Click here to download</a>'
                 st.markdown(download_link1, unsafe_allow_html=True)
 
-                fig2 = base64.b64decode(result['value']['figure2'])
+                fig2 = requests.post(f"{THIRD_PARTY_SAMPLING_ENDPOINT}/figures/real_units", json=figure_input).content
                 image2 = Image.open(BytesIO(fig2))
                 st.image(image2, caption="Third-Party Sampling Strategy Plot", use_container_width=True)
                 image_bytes2 = BytesIO()
@@ -196,5 +196,9 @@ def callAPIWithFileParam(file_details: dict, payload: dict, url: str):
         raise
 
 @st.cache_data(show_spinner=False)
-def fetch_dataframe(data_type: str, url: str):
-    return pd.DataFrame(requests.get(f"{url}?data_type={data_type}").json())
\ No newline at end of file
+def fetch_dataframe(data_type: str, url: str, artifact_id: str, limit: int = None):
+    params = {"data_type": data_type, "artifact_id": artifact_id}
+    if limit is not None:
+        params["limit"] = limit
+    response = requests.get(url, params=params)
+    return pd.DataFrame(response.json())
\ No newline at end of file
@@ -3,16 +3,38 @@ CREATE TABLE IF NOT EXISTS uploaded_files (
     id SERIAL PRIMARY KEY,
     filename VARCHAR,
     content BYTEA,
+    storage_format VARCHAR NOT NULL DEFAULT 'csv',
+    schema TEXT,
+    content_hash VARCHAR,
+    profile TEXT,
     upload_datetime TIMESTAMP WITH TIME ZONE DEFAULT now(),
     category VARCHAR,
     CONSTRAINT _filename_category_uc UNIQUE (filename, category)
 );
 
--- Change the owner of the table to the application user
+-- Create the simulation_results table caching seeded simulation responses
+CREATE TABLE IF NOT EXISTS simulation_results (
+    id SERIAL PRIMARY KEY,
+    kind VARCHAR NOT NULL,
+    params_hash VARCHAR NOT NULL,
+    result BYTEA NOT NULL,
+    size_bytes BIGINT NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_accessed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    CONSTRAINT _kind_params_hash_uc UNIQUE (kind, params_hash)
+);
+
+CREATE INDEX IF NOT EXISTS ix_simulation_results_created_at ON simulation_results (created_at);
+CREATE INDEX IF NOT EXISTS ix_simulation_results_last_accessed_at ON simulation_results (last_accessed_at);
+
+-- Change the owner of the tables to the application user
 ALTER TABLE uploaded_files OWNER TO "${POSTGRES_USER}";
+ALTER TABLE simulation_results OWNER TO "${POSTGRES_USER}";
 
 -- Grant privileges to the application user
 GRANT ALL PRIVILEGES ON TABLE uploaded_files TO "${POSTGRES_USER}";
+GRANT ALL PRIVILEGES ON TABLE simulation_results TO "${POSTGRES_USER}";
 
 -- Grant usage on the public schema
 GRANT USAGE ON SCHEMA public TO "${POSTGRES_USER}";